@@ -1,11 +1,14 @@
 from typing import List, Optional
-from fastapi import APIRouter, Query, HTTPException
-from enum import Enum
-from datetime import datetime
+from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
+from enum import StrEnum
+from datetime import datetime, timezone
+from uuid import UUID
 
 from app.services.database import DatabaseService
+from app.services.deps import get_db
 
-class SortBy(str, Enum):
+class SortBy(StrEnum):
     overall_score = "overall_score"
     performance_score = "performance_score"
     accessibility_score = "accessibility_score"
@@ -13,78 +16,91 @@ class SortBy(str, Enum):
     carbon_rating = "carbon_rating"
 
 router = APIRouter()
-db_service = DatabaseService()
 
-@router.get("/")
+@router.get("/", response_class=ORJSONResponse)
 async def get_leaderboard(
     sort_by: SortBy = Query(default=SortBy.overall_score, description="Sort criteria"),
     government_level: Optional[str] = Query(None, description="Filter by government level"),
     limit: int = Query(default=20, ge=1, le=100, description="Number of results"),
-    ascending: bool = Query(False, description="Sort in ascending order (default: descending)")
+    ascending: bool = Query(False, description="Sort in ascending order (default: descending)"),
+    after_value: Optional[str] = Query(None, description="Cursor: sort value of the last entry on the previous page"),
+    after_id: Optional[UUID] = Query(None, description="Cursor: latest report id of the last entry on the previous page"),
+    db_service: DatabaseService = Depends(get_db)
 ):
     """Get the performance leaderboard of government websites"""
     try:
         leaderboard_data = await db_service.get_leaderboard(
-            sort_by=sort_by.value,
+            sort_by=sort_by,
             government_level=government_level,
-            limit=limit
+            limit=limit,
+            ascending=ascending,
+            after_value=after_value,
+            after_id=str(after_id) if after_id else None
         )
         
-        # Reverse order if ascending is requested
-        if ascending:
-            leaderboard_data.reverse()
+        # A full page means there may be more; hand back the cursor for it
+        next_cursor = None
+        if len(leaderboard_data) == limit:
+            last_report = leaderboard_data[-1]['latest_report']
+            next_cursor = {
+                "after_value": last_report.get(sort_by),
+                "after_id": last_report.get('id')
+            }
         
-        return {
+        return ORJSONResponse({
             "entries": leaderboard_data,
             "total_count": len(leaderboard_data),
-            "sort_by": sort_by.value,
+            "sort_by": sort_by,
             "government_level_filter": government_level,
             "ascending": ascending,
-            "updated_at": datetime.utcnow().isoformat()
-        }
+            "next_cursor": next_cursor,
+            "updated_at": datetime.now(timezone.utc)
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch leaderboard: {str(e)}")
 
-@router.get("/shame-wall")
+@router.get("/shame-wall", response_class=ORJSONResponse)
 async def get_shame_wall(
     severity: Optional[str] = Query(None, description="Filter by severity (critical, high, medium)"),
-    limit: int = Query(default=50, ge=1, le=100, description="Number of results")
+    limit: int = Query(default=50, ge=1, le=100, description="Number of results"),
+    db_service: DatabaseService = Depends(get_db)
 ):
     """Get the shame wall - websites with poor performance/security"""
     try:
-        shame_data = await db_service.get_shame_wall(severity=severity)
-        
-        # Limit results
-        if limit and len(shame_data) > limit:
-            shame_data = shame_data[:limit]
+        shame_data = await db_service.get_shame_wall(severity=severity, limit=limit)
         
-        return {
+        return ORJSONResponse({
             "shame_wall": shame_data,
             "total_count": len(shame_data),
             "severity_filter": severity,
-            "updated_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.now(timezone.utc),
             "description": "Government websites that need immediate attention for security, performance, or accessibility issues"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch shame wall: {str(e)}")
 
-@router.get("/statistics")
-async def get_statistics():
+@router.get("/statistics", response_class=ORJSONResponse)
+async def get_statistics(
+    db_service: DatabaseService = Depends(get_db)
+):
     """Get overall statistics about monitored websites"""
     try:
+        # Cached by the service for STATISTICS_CACHE_TTL_SECONDS
         stats = await db_service.get_website_statistics()
-        
-        return {
+        return ORJSONResponse({
             "statistics": stats,
-            "updated_at": datetime.utcnow().isoformat()
-        }
+            "updated_at": stats["updated_at"]
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch statistics: {str(e)}")
 
-@router.get("/top-performers")
+@router.get("/top-performers", response_class=ORJSONResponse)
 async def get_top_performers(
-    category: str = Query("overall_score", description="Category to rank by"),
-    limit: int = Query(10, ge=1, le=50, description="Number of top performers")
+    category: SortBy = Query(SortBy.overall_score, description="Category to rank by"),
+    limit: int = Query(10, ge=1, le=50, description="Number of top performers"),
+    db_service: DatabaseService = Depends(get_db)
 ):
     """Get top performing government websites in a specific category"""
     try:
@@ -94,36 +110,39 @@ async def get_top_performers(
             limit=limit
         )
         
-        return {
+        return ORJSONResponse({
             "top_performers": top_performers,
             "category": category,
             "total_count": len(top_performers),
-            "updated_at": datetime.utcnow().isoformat()
-        }
+            "updated_at": datetime.now(timezone.utc)
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch top performers: {str(e)}")
 
-@router.get("/bottom-performers")
+@router.get("/bottom-performers", response_class=ORJSONResponse)
 async def get_bottom_performers(
-    category: str = Query("overall_score", description="Category to rank by"),
-    limit: int = Query(10, ge=1, le=50, description="Number of bottom performers")
+    category: SortBy = Query(SortBy.overall_score, description="Category to rank by"),
+    limit: int = Query(10, ge=1, le=50, description="Number of bottom performers"),
+    db_service: DatabaseService = Depends(get_db)
 ):
     """Get worst performing government websites in a specific category"""
     try:
-        # Get leaderboard data for the specific category (ascending order for worst)
+        # Ask the database for the lowest scores directly (ascending order)
         bottom_performers = await db_service.get_leaderboard(
             sort_by=category,
-            limit=limit
+            limit=limit,
+            ascending=True
         )
         
-        # Reverse to get worst performers
-        bottom_performers.reverse()
-        
-        return {
+        return ORJSONResponse({
             "bottom_performers": bottom_performers,
             "category": category,
             "total_count": len(bottom_performers),
-            "updated_at": datetime.utcnow().isoformat()
-        }
+            "updated_at": datetime.now(timezone.utc)
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bottom performers: {str(e)}")
\ No newline at end of file
@@ -1,9 +1,11 @@
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from uuid import UUID
 from datetime import datetime
 
 from app.models.report import Report, ReportResponse
+from app.services.database import DatabaseService
+from app.services.deps import get_db
 
 router = APIRouter()
 
@@ -15,4 +17,19 @@ async def get_website_reports(website_id: UUID):
 @router.get("/{report_id}", response_model=ReportResponse)
 async def get_report(report_id: UUID):
     """Get details of a specific report"""
-    raise HTTPException(status_code=404, detail="Report not found")
\ No newline at end of file
+    raise HTTPException(status_code=404, detail="Report not found")
+
+@router.get("/{report_id}/raw")
+async def get_report_raw(
+    report_id: UUID,
+    db_service: DatabaseService = Depends(get_db)
+):
+    """Get the raw PageSpeed, SSL and carbon data behind a report"""
+    try:
+        raw = await db_service.get_report_raw(str(report_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch report data: {str(e)}")
+
+    if not raw:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return raw
@@ -1,21 +1,22 @@
 from typing import Optional
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Depends
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.services.crawler import WatchtowerCrawler
 from app.services.database import DatabaseService
+from app.services.deps import get_db, get_crawler
 
 router = APIRouter()
-crawler = WatchtowerCrawler()
-db_service = DatabaseService()
 
 # IMPORTANT: /all must come BEFORE /{website_id} to avoid route conflicts
 @router.post("/all")
 async def scan_all_websites(
     background_tasks: BackgroundTasks,
     strategy: str = Query("mobile", description="Strategy: mobile or desktop"),
-    active_only: bool = Query(True, description="Scan only active websites")
+    active_only: bool = Query(True, description="Scan only active websites"),
+    db_service: DatabaseService = Depends(get_db),
+    crawler: WatchtowerCrawler = Depends(get_crawler)
 ):
     """
     Trigger a scan for all websites in the database
@@ -43,7 +44,7 @@ async def scan_all_websites(
             "strategy": strategy,
             "active_only": active_only,
             "message": f"Batch scan initiated for {website_count} websites. This may take several minutes.",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "estimated_duration_minutes": website_count * 0.5
         }
     
@@ -56,7 +57,8 @@ async def scan_all_websites(
 @router.post("/url")
 async def scan_single_url(
     url: str = Query(..., description="URL to scan (for testing)"),
-    strategy: str = Query("mobile", description="Strategy: mobile or desktop")
+    strategy: str = Query("mobile", description="Strategy: mobile or desktop"),
+    crawler: WatchtowerCrawler = Depends(get_crawler)
 ):
     """
     Scan a single URL without storing results (useful for testing)
@@ -78,7 +80,9 @@ async def scan_single_url(
 async def scan_website(
     website_id: UUID,
     background_tasks: BackgroundTasks,
-    strategy: str = Query("mobile", description="Strategy: mobile or desktop")
+    strategy: str = Query("mobile", description="Strategy: mobile or desktop"),
+    db_service: DatabaseService = Depends(get_db),
+    crawler: WatchtowerCrawler = Depends(get_crawler)
 ):
     """
     Trigger a scan for a specific website
@@ -103,7 +107,7 @@ async def scan_website(
             "website_url": website.get('url'),
             "strategy": strategy,
             "message": f"Scan initiated for {website.get('name')}. Results will be available shortly.",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     
     except HTTPException:
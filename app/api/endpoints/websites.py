@@ -1,45 +1,53 @@
+import asyncio
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 from uuid import UUID
 
-from app.services.database import DatabaseService
+from app.services.database import DatabaseService, WEBSITE_WITH_LATEST_REPORT_COLUMNS
+from app.services.deps import get_db
 
 router = APIRouter()
-db_service = DatabaseService()
 
-@router.get("/")
+@router.get("/", response_class=ORJSONResponse)
 async def list_websites(
     active_only: bool = Query(True, description="Show only active websites"),
-    government_level: Optional[str] = Query(None, description="Filter by government level")
+    government_level: Optional[str] = Query(None, description="Filter by government level"),
+    db_service: DatabaseService = Depends(get_db)
 ):
     """List all monitored government websites with their latest scores"""
     try:
-        websites = await db_service.get_all_websites(active_only=active_only)
+        websites = await db_service.get_all_websites(
+            active_only=active_only,
+            government_level=government_level,
+            columns=WEBSITE_WITH_LATEST_REPORT_COLUMNS
+        )
         
-        # Filter by government level if specified
-        if government_level:
-            websites = [w for w in websites if w.get('government_level') == government_level]
-        
-        return {
+        return ORJSONResponse({
             "websites": websites,
             "total_count": len(websites),
             "active_only": active_only,
             "government_level_filter": government_level
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch websites: {str(e)}")
 
 @router.get("/{website_id}")
-async def get_website(website_id: UUID):
+async def get_website(
+    website_id: UUID,
+    db_service: DatabaseService = Depends(get_db)
+):
     """Get details of a specific website with its latest report"""
     try:
-        website = await db_service.get_website_by_id(str(website_id))
+        # The website row and its latest reports are independent lookups
+        website, reports = await asyncio.gather(
+            db_service.get_website_by_id(str(website_id)),
+            db_service.get_website_reports(str(website_id), limit=5)
+        )
         if not website:
             raise HTTPException(status_code=404, detail="Website not found")
         
-        # Get latest reports for this website
-        reports = await db_service.get_website_reports(str(website_id), limit=5)
-        
         return {
             "website": website,
             "latest_reports": reports,
@@ -50,31 +58,48 @@ async def get_website(website_id: UUID):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch website: {str(e)}")
 
-@router.get("/{website_id}/reports")
+@router.get("/{website_id}/reports", response_class=ORJSONResponse)
 async def get_website_reports(
     website_id: UUID,
     limit: int = Query(10, ge=1, le=100, description="Number of reports to return"),
-    strategy: Optional[str] = Query(None, description="Filter by strategy (mobile/desktop)")
+    strategy: Optional[str] = Query(None, description="Filter by strategy (mobile/desktop)"),
+    db_service: DatabaseService = Depends(get_db)
 ):
     """Get historical reports for a specific website"""
     try:
-        reports = await db_service.get_website_reports(str(website_id), limit=limit)
+        reports = await db_service.get_website_reports(
+            str(website_id),
+            limit=limit,
+            strategy=strategy
+        )
         
-        # Filter by strategy if specified
-        if strategy:
-            reports = [r for r in reports if r.get('strategy') == strategy]
-        
-        return {
+        return ORJSONResponse({
             "website_id": str(website_id),
             "reports": reports,
             "total_count": len(reports),
             "strategy_filter": strategy
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch reports: {str(e)}")
 
+@router.get("/{website_id}/reports/export")
+async def export_website_reports(
+    website_id: UUID,
+    strategy: Optional[str] = Query(None, description="Filter by strategy (mobile/desktop)"),
+    db_service: DatabaseService = Depends(get_db)
+):
+    """Stream the full report history for a website as NDJSON (one report per line)"""
+    async def ndjson_lines():
+        async for batch in db_service.iter_website_reports(str(website_id), strategy=strategy):
+            yield b"".join(orjson.dumps(report) + b"\n" for report in batch)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @router.get("/{website_id}/latest")
-async def get_website_latest_score(website_id: UUID):
+async def get_website_latest_score(
+    website_id: UUID,
+    db_service: DatabaseService = Depends(get_db)
+):
     """Get the latest scores for a specific website"""
     try:
         reports = await db_service.get_website_reports(str(website_id), limit=1)
@@ -0,0 +1,117 @@
+"""
+Small in-process TTL cache for read-heavy endpoints
+"""
+import asyncio
+import functools
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# Every cache registers itself here so a finished scan can drop them all
+_registry: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+class TTLCache:
+    """
+    Async cache with a fixed time-to-live per entry
+
+    Concurrent misses for the same key are coalesced behind a lock, so a
+    burst of pollers triggers a single backend call per TTL window.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024, invalidate: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        # Bumped by clear(); a fill started before a clear must not store its value
+        self._generation = 0
+        # Caches of data not read from the database opt out of invalidate_caches()
+        if invalidate:
+            _registry.add(self)
+
+    async def get_or_set(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Return the cached value for key, awaiting factory() on a miss
+
+        A value is only stored if cacheable(value) is true (default: always);
+        a factory that raises never stores anything.
+        """
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another waiter may have filled the entry while we queued
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+
+            generation = self._generation
+            value = await factory()
+            if generation != self._generation:
+                # Invalidated while the factory ran: the value predates the write
+                return value
+            if cacheable is not None and not cacheable(value):
+                return value
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones if still full"""
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+            self._locks.pop(key, None)
+        while len(self._entries) >= self.max_entries:
+            key = next(iter(self._entries))
+            del self._entries[key]
+            self._locks.pop(key, None)
+
+    def clear(self):
+        """Drop every cached entry and the fill locks of their keys"""
+        self._generation += 1
+        self._entries.clear()
+        # A lock held by a fill in progress stays with its waiters; the
+        # next miss for that key just creates a fresh one
+        self._locks.clear()
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn dict/list arguments into hashable cache key parts"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def ttl_cached(ttl: float):
+    """
+    Cache an async function's results per distinct arguments for ttl seconds
+    """
+    def decorator(func):
+        cache = TTLCache(ttl)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (_freeze(args), _freeze(kwargs))
+            return await cache.get_or_set(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def invalidate_caches():
+    """Clear all TTL caches (called when new scan data is written)"""
+    for cache in list(_registry):
+        cache.clear()
@@ -15,9 +15,24 @@ class Settings(BaseSettings):
     
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"
+    STORE_RAW_REPORTS: bool = False
     
     SCAN_INTERVAL_HOURS: int = 24
     MAX_CONCURRENT_SCANS: int = 5
+    PAGESPEED_CONCURRENCY: int = 5
+    SSL_CONCURRENCY: int = 20
+    REPORT_BATCH_SIZE: int = 20
+    PAGESPEED_REQUESTS_PER_MINUTE: int = 240
+    PAGESPEED_PREFLIGHT: bool = False
+    PREFLIGHT_TIMEOUT_SECONDS: float = 3.0
+
+    STATISTICS_CACHE_TTL_SECONDS: int = 60
+    SUMMARY_CACHE_TTL_SECONDS: int = 15
+    LEADERBOARD_CACHE_TTL_SECONDS: int = 120
+    WEBSITES_CACHE_TTL_SECONDS: int = 60
+    SSL_CACHE_TTL_SECONDS: int = 300
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 60
+    HTTP_CACHE_STALE_SECONDS: int = 300
     
     model_config = SettingsConfigDict(env_file=".env")
 
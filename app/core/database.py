@@ -1,158 +0,0 @@
-"""
-Database connection and operations using Supabase MCP
-"""
-import json
-from typing import List, Dict, Any, Optional
-import logging
-
-logger = logging.getLogger(__name__)
-
-# Note: These functions will be called by the MCP system
-# We'll simulate the database operations for now and implement with actual MCP calls later
-
-async def execute_query(query: str, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
-    """Execute a SQL query using MCP Supabase"""
-    # This would use the MCP supabase__execute_sql function
-    # For now, return empty list as placeholder
-    logger.info(f"Executing query: {query}")
-    return []
-
-async def get_all_websites(active_only: bool = True) -> List[Dict[str, Any]]:
-    """Get all websites from database"""
-    if active_only:
-        query = "SELECT * FROM websites WHERE is_active = true ORDER BY name"
-    else:
-        query = "SELECT * FROM websites ORDER BY name"
-    
-    return await execute_query(query)
-
-async def get_website_by_id(website_id: str) -> Optional[Dict[str, Any]]:
-    """Get a specific website by ID"""
-    query = "SELECT * FROM websites WHERE id = %s"
-    result = await execute_query(query, {"id": website_id})
-    return result[0] if result else None
-
-async def get_websites_for_crawling() -> List[Dict[str, Any]]:
-    """Get all active websites that need to be crawled"""
-    query = "SELECT * FROM websites WHERE is_active = true ORDER BY name"
-    return await execute_query(query)
-
-async def store_report(report_data: Dict[str, Any]) -> str:
-    """Store analysis report in database"""
-    # Convert dict to SQL INSERT statement
-    columns = ", ".join(report_data.keys())
-    placeholders = ", ".join([f"%({key})s" for key in report_data.keys()])
-    
-    query = f"""
-    INSERT INTO reports ({columns})
-    VALUES ({placeholders})
-    RETURNING id
-    """
-    
-    result = await execute_query(query, report_data)
-    return result[0]["id"] if result else None
-
-async def get_latest_reports(limit: int = 50) -> List[Dict[str, Any]]:
-    """Get latest reports across all websites"""
-    query = """
-    SELECT r.*, w.name as website_name, w.url as website_url
-    FROM reports r
-    JOIN websites w ON r.website_id = w.id
-    ORDER BY r.scan_date DESC
-    LIMIT %s
-    """
-    return await execute_query(query, {"limit": limit})
-
-async def get_website_reports(website_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-    """Get reports for a specific website"""
-    query = """
-    SELECT * FROM reports
-    WHERE website_id = %s
-    ORDER BY scan_date DESC
-    LIMIT %s
-    """
-    return await execute_query(query, {"website_id": website_id, "limit": limit})
-
-async def get_leaderboard(
-    sort_by: str = 'overall_score',
-    government_level: Optional[str] = None,
-    limit: int = 20
-) -> List[Dict[str, Any]]:
-    """Get leaderboard of government websites"""
-    base_query = """
-    SELECT 
-        w.*,
-        r.overall_score,
-        r.performance_score,
-        r.accessibility_score,
-        r.ssl_security_score,
-        r.carbon_rating,
-        r.carbon_co2_grams,
-        r.shame_worthy,
-        r.scan_date
-    FROM websites w
-    LEFT JOIN LATERAL (
-        SELECT * FROM reports 
-        WHERE website_id = w.id 
-        ORDER BY scan_date DESC 
-        LIMIT 1
-    ) r ON true
-    WHERE w.is_active = true
-    """
-    
-    if government_level:
-        base_query += f" AND w.government_level = '{government_level}'"
-    
-    base_query += f" ORDER BY r.{sort_by} DESC NULLS LAST LIMIT {limit}"
-    
-    return await execute_query(base_query)
-
-async def get_shame_wall(severity: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Get websites that are shame-worthy"""
-    base_query = """
-    SELECT 
-        w.*,
-        r.overall_score,
-        r.performance_score,
-        r.ssl_security_score,
-        r.ssl_shame_severity,
-        r.shame_worthy,
-        r.scan_date
-    FROM websites w
-    LEFT JOIN LATERAL (
-        SELECT * FROM reports 
-        WHERE website_id = w.id 
-        ORDER BY scan_date DESC 
-        LIMIT 1
-    ) r ON true
-    WHERE w.is_active = true AND r.shame_worthy = true
-    """
-    
-    if severity:
-        base_query += f" AND r.ssl_shame_severity = '{severity}'"
-    
-    base_query += " ORDER BY r.overall_score ASC"
-    
-    return await execute_query(base_query)
-
-async def get_website_statistics() -> Dict[str, Any]:
-    """Get overall statistics about monitored websites"""
-    stats_query = """
-    SELECT 
-        COUNT(*) as total_websites,
-        COUNT(CASE WHEN is_active THEN 1 END) as active_websites,
-        (SELECT COUNT(*) FROM reports) as total_reports,
-        (SELECT AVG(overall_score) FROM reports WHERE overall_score > 0) as avg_overall_score,
-        (SELECT COUNT(*) FROM reports WHERE shame_worthy = true) as shame_worthy_count,
-        (SELECT MAX(scan_date) FROM reports) as latest_scan_date
-    FROM websites
-    """
-    
-    result = await execute_query(stats_query)
-    return result[0] if result else {
-        'total_websites': 0,
-        'total_reports': 0,
-        'avg_overall_score': 0,
-        'shame_worthy_count': 0,
-        'latest_scan_date': None
-    }
\ No newline at end of file
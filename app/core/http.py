@@ -0,0 +1,89 @@
+"""
+Outbound HTTP client helpers for the analysis services
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+import orjson
+
+
+class ORJSONClient(httpx.AsyncClient):
+    """
+    AsyncClient that encodes json= request bodies with orjson, which is
+    several times faster than the stdlib encoder on large report payloads.
+    It also counts its requests, so pool usage can be reported without
+    reaching into httpcore internals.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests_sent = 0
+        self.in_flight = 0
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        self.requests_sent += 1
+        self.in_flight += 1
+        try:
+            return await super().send(request, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+    def build_request(self, method, url, *, json=None, content=None, headers=None, **kwargs) -> httpx.Request:
+        if json is not None:
+            content = orjson.dumps(json)
+            headers = httpx.Headers(headers)
+            headers.setdefault('Content-Type', 'application/json')
+        return super().build_request(method, url, content=content, headers=headers, **kwargs)
+
+
+def create_scan_client(max_connections: int) -> httpx.AsyncClient:
+    """
+    Client shared by all PageSpeed and HTTPS probes of a crawler, so
+    connections (and their TLS sessions) are reused across websites
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
+
+
+@asynccontextmanager
+async def http_client(shared: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the shared client if there is one, else a client for this call only"""
+    if shared is not None:
+        yield shared
+    else:
+        async with httpx.AsyncClient() as client:
+            yield client
+
+
+class RateLimiter:
+    """
+    Token bucket allowing at most `rate` acquisitions per `period` seconds.
+    Use as `async with limiter:` around each outbound API call.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self.capacity = rate
+        self.refill_per_second = rate / period
+        self._tokens = rate
+        self._updated = time.monotonic()
+
+    async def __aenter__(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.refill_per_second)
+
+    async def __aexit__(self, *exc_info):
+        return False
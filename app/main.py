@@ -1,10 +1,15 @@
+import hashlib
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
+from app.core.cache import invalidate_caches
 from app.core.config import settings, setup_logging
 from app.api.api import api_router
+from app.services.database import DatabaseService
+from app.services.deps import init_services, close_services, get_crawler, get_db
 from app.services.scheduler import get_scheduler
 
 # Setup logging
@@ -20,9 +25,12 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting Watchtower API...")
 
+    # Create the shared database and crawler services
+    init_services()
+
     # Start the scheduler
     try:
-        scheduler = get_scheduler()
+        scheduler = get_scheduler(crawler=await get_crawler())
         scheduler.start()
         logger.info("✅ Scheduler initialized and started")
     except Exception as e:
@@ -42,6 +50,8 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error stopping scheduler: {e}")
 
+    await close_services()
+
     logger.info("👋 Watchtower API shutdown complete")
 
 
@@ -50,6 +60,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     description="Government website monitoring and accountability platform",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -63,6 +74,59 @@ app.add_middleware(
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Read-only endpoints whose data only changes when a scan lands
+HTTP_CACHED_PREFIXES = (
+    f"{settings.API_V1_STR}/leaderboard",
+    f"{settings.API_V1_STR}/stats",
+)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak If-None-Match comparison against a comma-separated list or *"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+@app.middleware("http")
+async def http_cache_headers(request: Request, call_next):
+    """
+    Add Cache-Control and a weak ETag to leaderboard and stats responses.
+    The ETag hashes the rendered body, so it is the same on every worker and
+    changes with the data; a matching If-None-Match is answered with 304.
+    The handlers serve from the TTL caches, so rendering stays cheap.
+    """
+    if request.method != "GET" or not request.url.path.startswith(HTTP_CACHED_PREFIXES):
+        return await call_next(request)
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {
+        "ETag": f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"',
+        "Cache-Control": (
+            f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={settings.HTTP_CACHE_STALE_SECONDS}"
+        ),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    response_headers = dict(response.headers)
+    response_headers.update(headers)
+    return Response(
+        content=body,
+        status_code=response.status_code,
+        headers=response_headers,
+        media_type=response.media_type
+    )
+
 @app.get("/")
 async def root():
     return {
@@ -82,4 +146,21 @@ async def health_check():
         "status": "healthy",
         "version": "0.1.0",
         "scheduler": scheduler_status
-    }
\ No newline at end of file
+    }
+
+@app.get("/debug/pool")
+async def debug_pool(db_service: DatabaseService = Depends(get_db)):
+    """Request counts on the Supabase client's connection pool (DEBUG only)"""
+    if not settings.DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    return db_service.get_pool_status()
+
+@app.post("/debug/cache/flush")
+async def flush_caches():
+    """Drop every in-process TTL cache so the next reads hit Supabase (DEBUG only)"""
+    if not settings.DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    invalidate_caches()
+    return {"status": "flushed"}
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, ConfigDict
+
+class RecordModel(BaseModel):
+    """
+    Base for models built from database rows and API payloads
+
+    Instances are immutable and unknown columns are dropped, so rows can be
+    passed straight in even when the query selects extra fields.
+    """
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
@@ -1,9 +1,9 @@
-from pydantic import BaseModel
+from app.models.base import RecordModel
 from uuid import UUID
 from datetime import datetime
 from typing import List
 
-class LeaderboardEntry(BaseModel):
+class LeaderboardEntry(RecordModel):
     rank: int
     website_id: UUID
     website_name: str
@@ -15,7 +15,7 @@ class LeaderboardEntry(BaseModel):
     design_score: int
     last_scan_date: datetime
 
-class LeaderboardResponse(BaseModel):
+class LeaderboardResponse(RecordModel):
     entries: List[LeaderboardEntry]
     total_count: int
     sort_by: str
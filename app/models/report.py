@@ -1,16 +1,16 @@
-from pydantic import BaseModel
+from app.models.base import RecordModel
 from uuid import UUID
 from datetime import datetime
 from typing import Dict, Optional, Any
 
-class PageSpeedScores(BaseModel):
+class PageSpeedScores(RecordModel):
     performance: int
     accessibility: int
     best_practices: int
     seo: int
     pwa: int
 
-class CoreWebVitals(BaseModel):
+class CoreWebVitals(RecordModel):
     # Field data (real user data)
     first_contentful_paint: Optional[float] = None
     first_input_delay: Optional[float] = None
@@ -19,7 +19,7 @@ class CoreWebVitals(BaseModel):
     interaction_to_next_paint: Optional[float] = None
     time_to_first_byte: Optional[float] = None
 
-class LabData(BaseModel):
+class LabData(RecordModel):
     # Lab data (Lighthouse simulation)
     first_contentful_paint: Optional[float] = None
     speed_index: Optional[float] = None
@@ -28,12 +28,12 @@ class LabData(BaseModel):
     total_blocking_time: Optional[float] = None
     cumulative_layout_shift: Optional[float] = None
 
-class EnvironmentalImpact(BaseModel):
+class EnvironmentalImpact(RecordModel):
     co2_grams: float
     total_mb: float
     energy_kwh: float
 
-class PageSpeedMetrics(BaseModel):
+class PageSpeedMetrics(RecordModel):
     total_byte_weight: Optional[float] = None
     dom_size: Optional[float] = None
     max_potential_fid: Optional[float] = None
@@ -41,11 +41,11 @@ class PageSpeedMetrics(BaseModel):
     main_thread_work: Optional[float] = None
     bootup_time: Optional[float] = None
 
-class PageSpeedResults(BaseModel):
+class PageSpeedResults(RecordModel):
     mobile: Optional[Dict[str, Any]] = None
     desktop: Optional[Dict[str, Any]] = None
 
-class AIAnalysis(BaseModel):
+class AIAnalysis(RecordModel):
     accessibility_score: int
     design_quality_score: int
     content_quality_score: int
@@ -53,7 +53,7 @@ class AIAnalysis(BaseModel):
     recommendations: list[str]
     language_accessibility: Optional[Dict[str, int]] = None
 
-class Report(BaseModel):
+class Report(RecordModel):
     id: UUID
     website_id: UUID
     scan_date: datetime
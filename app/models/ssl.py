@@ -1,8 +1,8 @@
-from pydantic import BaseModel
+from app.models.base import RecordModel
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
-class SSLCertificate(BaseModel):
+class SSLCertificate(RecordModel):
     valid: bool
     expired: bool
     self_signed: bool
@@ -17,14 +17,14 @@ class SSLCertificate(BaseModel):
     certificate_chain_length: int = 0
     errors: List[str] = []
 
-class HTTPSConfiguration(BaseModel):
+class HTTPSConfiguration(RecordModel):
     enforced: bool
     redirects_to_https: bool
     hsts_enabled: bool
     hsts_max_age: Optional[int] = None
     mixed_content_risk: bool = False
 
-class SSLConfiguration(BaseModel):
+class SSLConfiguration(RecordModel):
     protocols_supported: List[str] = []
     ciphers_supported: List[str] = []
     vulnerable_protocols: List[str] = []
@@ -33,12 +33,12 @@ class SSLConfiguration(BaseModel):
     compression_enabled: bool = False
     renegotiation_secure: bool = True
 
-class ShameAssessment(BaseModel):
+class ShameAssessment(RecordModel):
     worthy: bool
     severity: str  # none, low, medium, high, critical
     reasons: List[str] = []
 
-class SSLSecurityReport(BaseModel):
+class SSLSecurityReport(RecordModel):
     url: str
     hostname: str
     port: int
@@ -50,7 +50,7 @@ class SSLSecurityReport(BaseModel):
     recommendations: List[str] = []
     shame_worthy: ShameAssessment
 
-class SSLBulkScanResult(BaseModel):
+class SSLBulkScanResult(RecordModel):
     """For scanning multiple government sites at once"""
     total_scanned: int
     shame_worthy_sites: List[Dict[str, Any]] = []
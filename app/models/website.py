@@ -1,4 +1,5 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import HttpUrl
+from app.models.base import RecordModel
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
@@ -9,7 +10,7 @@ class GovernmentLevel(str, Enum):
     state = "state"
     local = "local"
 
-class WebsiteBase(BaseModel):
+class WebsiteBase(RecordModel):
     name: str
     url: HttpUrl
     government_level: GovernmentLevel
@@ -1,10 +1,39 @@
 import logging
-from typing import Dict, Optional, Any
-from dataclasses import dataclass
+import re
+from bisect import bisect_left
+from typing import Dict, Optional, Any, Tuple
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# URL hints used by estimate_website_pages (".gov.pk" also matches ".gov.")
+_GOV_DOMAIN_RE = re.compile(r'\.gov\.', re.IGNORECASE)
+_DEPARTMENT_RE = re.compile(r'ministry|department', re.IGNORECASE)
+
+# Unit conversions as multipliers (both are powers of two, so exact)
+_BYTES_TO_MB = 1.0 / (1024 * 1024)
+_MB_TO_GB = 1.0 / 1024
+
+# Quantization of the calculate_website_footprint cache key: page sizes keep
+# three significant figures (under 0.5% off, never zero), response times 50 ms
+_PAGE_SIZE_SIGNIFICANT_FIGURES = 3
+_RESPONSE_TIME_BUCKET_MS = 50
+
+# Upper bounds (inclusive, grams CO2 per page) for each rating band; bisect_left
+# keeps a value equal to a bound in the lower (better) band
+_CARBON_THRESHOLDS: Tuple[float, ...] = (0.5, 1.0, 2.0, 4.0, 7.0)
+_CARBON_RATINGS: Tuple[str, ...] = ("A+", "A", "B", "C", "D", "F")
+_CARBON_PERCENTILES: Tuple[int, ...] = (95, 85, 70, 50, 25, 10)
+
+# Appended to every set of carbon recommendations
+_ALWAYS_RECOMMENDATIONS: Tuple[str, ...] = (
+    "📱 Optimize for mobile devices to reduce data usage",
+    "🔧 Minimize HTTP requests and enable compression",
+    "🌍 Use efficient web fonts and avoid excessive web fonts"
+)
+
 class EnergySource(Enum):
     """Different energy sources with their carbon intensities (gCO2/kWh)"""
     GLOBAL_AVERAGE = 475
@@ -23,7 +52,7 @@ class DataCenter(Enum):
     HYPERSCALE = 1.1
     GREEN = 1.05
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CarbonFootprintResult:
     """Result of carbon footprint calculation"""
     total_co2_grams: float
@@ -35,7 +64,65 @@ class CarbonFootprintResult:
     end_user_device_co2: float
     methodology: str
     confidence_level: str  # high, medium, low
-    recommendations: list[str]
+    recommendations: Tuple[str, ...]
+
+@dataclass(frozen=True, slots=True)
+class _FootprintConstants:
+    """CO2 coefficients (grams) for one energy source / data center pairing"""
+    data_transfer_per_gb: float
+    network_per_gb: float
+    server_per_watt: float
+    device_base: float
+    device_per_mb: float
+
+
+def _rounded_mb(page_size_mb: float) -> float:
+    """Page size for reporting; sub-0.01 MB pages keep more digits instead of showing 0"""
+    return round(page_size_mb, 2) or round(page_size_mb, 4)
+
+
+@lru_cache(maxsize=None)
+def _constants_for(intensity: float, pue: float, network_efficiency: float) -> _FootprintConstants:
+    """
+    Fold the fixed energy factors and carbon intensity into per-unit
+    coefficients, once per (intensity, PUE, network efficiency) combination
+    """
+    return _FootprintConstants(
+        # Data transfer: network_efficiency kWh per GB transferred
+        data_transfer_per_gb=network_efficiency * intensity,
+        # Network infrastructure (routers, switches): ~0.1 kWh per GB
+        network_per_gb=0.1 * intensity,
+        # Server: watts for ~1 second of processing, times data center PUE
+        server_per_watt=(1 / 1000) * (1 / 3600) * pue * intensity,
+        # End-user device: 2W while rendering, 3s base plus 0.5s per MB
+        device_base=(2.0 / 1000) * (3 / 3600) * intensity,
+        device_per_mb=(2.0 / 1000) * (0.5 / 3600) * intensity
+    )
+
+
+def _compute_footprint(
+    page_size_mb: float,
+    response_time_ms: Optional[float],
+    constants: _FootprintConstants
+) -> Tuple[float, float, float, float]:
+    """
+    CO2 grams for one page view, split into data transfer, server processing,
+    network transmission and end-user device components
+    """
+    page_size_gb = page_size_mb * _MB_TO_GB
+
+    # Server: 0.5W base per request, scaled by page size (capped at 10MB)
+    # and response time (capped at 5x for very slow responses)
+    size_factor = min(page_size_mb, 10)
+    time_factor = min(response_time_ms / 500, 5) if response_time_ms else 1.0
+    server_watts = 0.5 * (1 + size_factor * 0.1) * time_factor
+
+    return (
+        page_size_gb * constants.data_transfer_per_gb,
+        server_watts * constants.server_per_watt,
+        page_size_gb * constants.network_per_gb,
+        constants.device_base + page_size_mb * constants.device_per_mb
+    )
 
 class CarbonFootprintCalculator:
     """
@@ -82,26 +169,54 @@ class CarbonFootprintCalculator:
         energy_source = energy_source or self.energy_source
         datacenter_type = datacenter_type or self.datacenter_pue
 
-        # Convert bytes to MB/GB
-        page_size_mb = page_size_bytes / (1024 * 1024)
-        page_size_gb = page_size_mb / 1024
-
-        # Calculate different components of carbon footprint for SINGLE PAGE
-        data_transfer_co2 = self._calculate_data_transfer_footprint(
-            page_size_gb, energy_source
+        # Quantize the inputs so repeat scans of similar pages share a cached
+        # result; the reported page size below stays the exact one
+        bucketed_size = page_size_bytes
+        if page_size_bytes > 0:
+            bucketed_size = int(float(f"{page_size_bytes:.{_PAGE_SIZE_SIGNIFICANT_FIGURES}g}"))
+        if server_response_time_ms is not None:
+            server_response_time_ms = round(server_response_time_ms / _RESPONSE_TIME_BUCKET_MS) * _RESPONSE_TIME_BUCKET_MS
+
+        result = self._calculate_bucketed_footprint(
+            bucketed_size,
+            server_response_time_ms,
+            monthly_visitors,
+            energy_source.value,
+            datacenter_type.value,
+            self.network_efficiency,
+            estimated_pages,
+            pages_per_visit
         )
 
-        server_processing_co2 = self._calculate_server_processing_footprint(
-            page_size_bytes, server_response_time_ms, energy_source, datacenter_type
-        )
+        data_transfer_mb = _rounded_mb(page_size_bytes * _BYTES_TO_MB)
+        if data_transfer_mb != result.data_transfer_mb:
+            result = replace(result, data_transfer_mb=data_transfer_mb)
+        return result
 
-        network_transmission_co2 = self._calculate_network_transmission_footprint(
-            page_size_gb, energy_source
-        )
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _calculate_bucketed_footprint(
+        page_size_bytes: int,
+        server_response_time_ms: Optional[float],
+        monthly_visitors: Optional[int],
+        intensity: float,
+        pue: float,
+        network_efficiency: float,
+        estimated_pages: Optional[int],
+        pages_per_visit: float
+    ) -> "CarbonFootprintResult":
+        """Footprint for already-quantized inputs, memoized per distinct key"""
+        # Convert bytes to MB
+        page_size_mb = page_size_bytes * _BYTES_TO_MB
+        constants = _constants_for(intensity, pue, network_efficiency)
 
-        end_user_device_co2 = self._calculate_end_user_device_footprint(
-            page_size_bytes, energy_source
-        )
+        # Calculate different components of carbon footprint for SINGLE PAGE
+        (
+            data_transfer_co2,
+            server_processing_co2,
+            network_transmission_co2,
+            end_user_device_co2
+        ) = _compute_footprint(page_size_mb, server_response_time_ms, constants)
 
         # Total footprint PER PAGE
         total_co2_per_page = (
@@ -112,7 +227,7 @@ class CarbonFootprintCalculator:
         )
 
         # Calculate total energy consumption per page
-        total_energy_kwh_per_page = total_co2_per_page / energy_source.value * 1000
+        total_energy_kwh_per_page = total_co2_per_page / intensity * 1000
 
         # WEBSITE-WIDE ESTIMATION
         # If we have visitor data, calculate per-visit footprint
@@ -134,19 +249,19 @@ class CarbonFootprintCalculator:
             total_energy_kwh = total_energy_kwh_per_page
 
         # Generate recommendations
-        recommendations = self._generate_carbon_recommendations(
+        recommendations = CarbonFootprintCalculator._generate_carbon_recommendations(
             page_size_mb, total_co2, server_response_time_ms, estimated_pages
         )
 
         # Determine confidence level
-        confidence = self._determine_confidence_level(
+        confidence = CarbonFootprintCalculator._determine_confidence_level(
             server_response_time_ms, monthly_visitors, estimated_pages
         )
 
         return CarbonFootprintResult(
             total_co2_grams=round(total_co2, 4),
             energy_kwh=round(total_energy_kwh, 6),
-            data_transfer_mb=round(page_size_mb, 2),
+            data_transfer_mb=_rounded_mb(page_size_mb),
             data_transfer_co2=round(data_transfer_co2, 4),
             server_processing_co2=round(server_processing_co2, 4),
             network_transmission_co2=round(network_transmission_co2, 4),
@@ -156,108 +271,13 @@ class CarbonFootprintCalculator:
             recommendations=recommendations
         )
 
-    def _calculate_data_transfer_footprint(
-        self,
-        page_size_gb: float,
-        energy_source: EnergySource
-    ) -> float:
-        """
-        Calculate CO2 from data transfer
-        Based on: 0.81 kWh per GB transferred (global average)
-        """
-        # Energy consumption for data transfer
-        energy_kwh = page_size_gb * self.network_efficiency
-
-        # Convert to CO2 (grams)
-        co2_grams = energy_kwh * energy_source.value
-
-        return co2_grams
-
-    def _calculate_server_processing_footprint(
-        self,
-        page_size_bytes: int,
-        response_time_ms: Optional[float],
-        energy_source: EnergySource,
-        datacenter_type: DataCenter
-    ) -> float:
-        """
-        Calculate CO2 from server processing
-        Based on page complexity and response time
-        """
-        # Base energy consumption (watts per request)
-        base_server_watts = 0.5  # Conservative estimate for a web request
-
-        # Adjust based on page size (larger pages need more processing)
-        size_factor = min(page_size_bytes / (1024 * 1024), 10)  # Cap at 10MB equivalent
-
-        # Adjust based on response time if available
-        time_factor = 1.0
-        if response_time_ms:
-            # Longer response times indicate more server work
-            time_factor = min(response_time_ms / 500, 5)  # Cap at 5x for very slow responses
-
-        # Calculate energy consumption
-        server_watts = base_server_watts * (1 + size_factor * 0.1) * time_factor
-        server_kwh = (server_watts / 1000) * (1 / 3600)  # Convert to kWh (assuming 1 second processing)
-
-        # Apply datacenter PUE (Power Usage Effectiveness)
-        total_kwh = server_kwh * datacenter_type.value
-
-        # Convert to CO2
-        co2_grams = total_kwh * energy_source.value
-
-        return co2_grams
-
-    def _calculate_network_transmission_footprint(
-        self,
-        page_size_gb: float,
-        energy_source: EnergySource
-    ) -> float:
-        """
-        Calculate CO2 from network infrastructure
-        Separate from data transfer - this is the network equipment energy
-        """
-        # Network infrastructure energy (routers, switches, etc.)
-        # Approximately 0.1 kWh per GB for network equipment
-        network_kwh = page_size_gb * 0.1
-
-        co2_grams = network_kwh * energy_source.value
-
-        return co2_grams
-
-    def _calculate_end_user_device_footprint(
-        self,
-        page_size_bytes: int,
-        energy_source: EnergySource
-    ) -> float:
-        """
-        Calculate CO2 from end-user device energy consumption
-        Based on page rendering complexity
-        """
-        # Base device energy for rendering (watts)
-        base_device_watts = 2.0  # CPU + screen energy for web browsing
-
-        # Adjust based on page size (larger pages take more energy to render)
-        size_factor = page_size_bytes / (1024 * 1024)  # MB
-
-        # Estimate rendering time (seconds)
-        rendering_time_seconds = 3 + (size_factor * 0.5)  # Base 3 seconds + extra for large pages
-
-        # Calculate energy consumption
-        device_kwh = (base_device_watts / 1000) * (rendering_time_seconds / 3600)
-
-        # Convert to CO2
-        co2_grams = device_kwh * energy_source.value
-
-        return co2_grams
-
+    @staticmethod
     def _generate_carbon_recommendations(
-        self,
         page_size_mb: float,
         total_co2_grams: float,
         response_time_ms: Optional[float],
         estimated_pages: Optional[int] = None
-    ) -> list[str]:
+    ) -> Tuple[str, ...]:
         """Generate recommendations to reduce carbon footprint"""
         recommendations = []
 
@@ -286,17 +306,10 @@ class CarbonFootprintCalculator:
             recommendations.append("♻️ Implement aggressive caching strategies")
             recommendations.append("🌿 Consider carbon offset programs for high-traffic sites")
 
-        # Always include these
-        recommendations.extend([
-            "📱 Optimize for mobile devices to reduce data usage",
-            "🔧 Minimize HTTP requests and enable compression",
-            "🌍 Use efficient web fonts and avoid excessive web fonts"
-        ])
-
-        return recommendations
+        return (*recommendations, *_ALWAYS_RECOMMENDATIONS)
 
+    @staticmethod
     def _determine_confidence_level(
-        self,
         response_time_ms: Optional[float],
         monthly_visitors: Optional[int],
         estimated_pages: Optional[int] = None
@@ -378,33 +391,11 @@ class CarbonFootprintCalculator:
 
     def _get_carbon_rating(self, co2_grams: float) -> str:
         """Get letter grade for carbon footprint"""
-        if co2_grams <= 0.5:
-            return "A+"
-        elif co2_grams <= 1.0:
-            return "A"
-        elif co2_grams <= 2.0:
-            return "B"
-        elif co2_grams <= 4.0:
-            return "C"
-        elif co2_grams <= 7.0:
-            return "D"
-        else:
-            return "F"
+        return _CARBON_RATINGS[bisect_left(_CARBON_THRESHOLDS, co2_grams)]
 
     def _get_percentile(self, co2_grams: float) -> int:
         """Get percentile ranking (lower CO2 = higher percentile)"""
-        if co2_grams <= 0.5:
-            return 95
-        elif co2_grams <= 1.0:
-            return 85
-        elif co2_grams <= 2.0:
-            return 70
-        elif co2_grams <= 4.0:
-            return 50
-        elif co2_grams <= 7.0:
-            return 25
-        else:
-            return 10
+        return _CARBON_PERCENTILES[bisect_left(_CARBON_THRESHOLDS, co2_grams)]
 
     def estimate_website_pages(self, url: str, page_size_bytes: int) -> int:
         """
@@ -416,7 +407,7 @@ class CarbonFootprintCalculator:
         - Large sites (> 2MB): ~200-1000 pages
         - Government portals typically have 100-500 pages
         """
-        page_size_mb = page_size_bytes / (1024 * 1024)
+        page_size_mb = page_size_bytes * _BYTES_TO_MB
 
         # Base estimate on page size (larger homepage usually means more pages)
         if page_size_mb < 0.5:
@@ -429,11 +420,11 @@ class CarbonFootprintCalculator:
             base_estimate = 500
 
         # Government websites (.gov.pk) typically have more pages
-        if '.gov.pk' in url or '.gov.' in url:
+        if _GOV_DOMAIN_RE.search(url):
             base_estimate = int(base_estimate * 1.5)
 
         # Ministry/department sites tend to be larger
-        if any(keyword in url.lower() for keyword in ['ministry', 'department', 'ministry']):
+        if _DEPARTMENT_RE.search(url):
             base_estimate = int(base_estimate * 1.3)
 
         return min(base_estimate, 1000)  # Cap at 1000 pages
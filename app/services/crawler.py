@@ -1,12 +1,15 @@
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 
 from app.services.pagespeed import PageSpeedInsights
 from app.services.ssl_checker import SSLChecker
 from app.services.database import DatabaseService
 from app.core.config import settings
+from app.core.http import create_scan_client
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +18,33 @@ class WatchtowerCrawler:
     Main crawler service that orchestrates website analysis
     Combines PageSpeed, SSL, and Carbon footprint analysis
     """
+
+    # Seconds each scan slot waits before picking up the next website
+    SCAN_DELAY_SECONDS = 2
     
-    def __init__(self):
-        self.pagespeed = PageSpeedInsights()
-        self.ssl_checker = SSLChecker()
-        self.db = DatabaseService()
-        # Note: We scan websites sequentially to respect PageSpeed API limits
-        # Setting max_concurrent is kept for future use if needed
+    def __init__(
+        self,
+        db: Optional[DatabaseService] = None,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        # Each scan slot makes a few requests at once (PageSpeed, HTTP and HTTPS probes)
+        self.http_client = create_scan_client(max_connections=settings.MAX_CONCURRENT_SCANS * 4)
+        self.pagespeed = PageSpeedInsights(client=self.http_client)
+        self.ssl_checker = SSLChecker(client=self.http_client)
+        self.db = db or DatabaseService()
+        # Injectable so tests can skip the polite delay between scans
+        self._sleep = sleep
+        # Caps parallel website analyses during a full crawl
+        self._scan_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_SCANS)
+        # Separate caps per backend, so slow PageSpeed calls (rate limited
+        # by Google) never hold up the much cheaper TLS probes, and single
+        # URL scans triggered through the API count against them too
+        self._pagespeed_semaphore = asyncio.Semaphore(settings.PAGESPEED_CONCURRENCY)
+        self._ssl_semaphore = asyncio.Semaphore(settings.SSL_CONCURRENCY)
+        
+    async def close(self):
+        """Close the shared outbound HTTP client"""
+        await self.http_client.aclose()
         
     async def crawl_all_websites(self, strategy: str = "mobile") -> Dict[str, Any]:
         """
@@ -33,7 +56,11 @@ class WatchtowerCrawler:
         Returns:
             Summary of crawl results
         """
-        start_time = datetime.utcnow()
+        start_time = datetime.now(timezone.utc)
+        # Duration comes from the monotonic clock, immune to wall-clock (NTP) jumps
+        started = time.perf_counter()
+        # Every report from this crawl carries the crawl's start as its scan date
+        scan_date = start_time.isoformat()
         logger.info(f"Starting crawl of all websites with {strategy} strategy")
         
         # Get all websites to crawl
@@ -50,41 +77,41 @@ class WatchtowerCrawler:
         
         logger.info(f"Found {len(websites)} websites to crawl")
 
-        # Process websites ONE AT A TIME to respect Google PageSpeed API limits
-        # PageSpeed Insights has strict rate limits and doesn't like concurrent requests
-        results = []
-        errors = []
-        successful_results = []
+        # Look up every site's hostname once, up front and concurrently
+        await self.ssl_checker.resolve_hosts(urlparse(w.get('url', '')).hostname for w in websites)
 
-        # Process websites sequentially
-        for index, website in enumerate(websites, 1):
-            try:
-                logger.info(f"📊 Scanning {index}/{len(websites)}: {website.get('name', 'Unknown')} ({website.get('url', '')})")
-
-                result = await self.analyze_website(website, strategy)
+        # Scan up to MAX_CONCURRENT_SCANS websites at a time with a fixed set of
+        # workers pulling from one shared iterator, so no per-website task is
+        # created up front. Each slot also waits between scans so PageSpeed
+        # API rate limits are respected
+        total = len(websites)
+        pending_reports: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * total
+        remaining = iter(enumerate(websites, 1))
 
-                if result:
-                    successful_results.append(result)
-                    logger.info(f"✅ {index}/{len(websites)} completed successfully")
-                else:
-                    error_msg = f"Failed to crawl {website.get('url', 'unknown')}: Analysis returned None"
-                    logger.warning(error_msg)
-                    errors.append(error_msg)
+        # analyze_website records its own failures in each result, so a
+        # worker never has an exception to capture
+        async def worker():
+            for index, website in remaining:
+                outcomes[index - 1] = await self._crawl_with_limit(
+                    index, total, website, strategy, pending_reports, scan_date
+                )
 
-                # Add a delay between requests to be respectful of API limits
-                # Only delay if there are more websites to scan
-                if index < len(websites):
-                    delay = 2  # 2 seconds between scans
-                    logger.info(f"⏳ Waiting {delay}s before next scan...")
-                    await asyncio.sleep(delay)
+        await asyncio.gather(*(worker() for _ in range(min(settings.MAX_CONCURRENT_SCANS, total))))
+        await self._flush_reports(pending_reports)
 
-            except Exception as e:
-                error_msg = f"Failed to crawl {website.get('url', 'unknown')}: {str(e)}"
-                logger.error(error_msg)
+        errors = []
+        successful_results = []
+        for website, result in zip(websites, outcomes):
+            if result:
+                successful_results.append(result)
+            else:
+                error_msg = f"Failed to crawl {website.get('url', 'unknown')}: Analysis returned None"
+                logger.warning(error_msg)
                 errors.append(error_msg)
         
-        end_time = datetime.utcnow()
-        duration = (end_time - start_time).total_seconds()
+        end_time = datetime.now(timezone.utc)
+        duration = time.perf_counter() - started
         
         summary = {
             "status": "completed",
@@ -101,10 +128,59 @@ class WatchtowerCrawler:
         
         return summary
     
+    async def _crawl_with_limit(
+        self,
+        index: int,
+        total: int,
+        website: Dict[str, Any],
+        strategy: str,
+        pending_reports: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        scan_date: str
+    ) -> Dict[str, Any]:
+        """Analyze one website while holding a scan slot"""
+        async with self._scan_semaphore:
+            logger.info(f"📊 Scanning {index}/{total}: {website.get('name', 'Unknown')} ({website.get('url', '')})")
+
+            result = await self.analyze_website(
+                website, strategy, report_buffer=pending_reports, scan_date=scan_date
+            )
+            if result:
+                logger.info(f"✅ {index}/{total} completed")
+
+            # Reports are written in bulk once a batch's worth is buffered
+            if len(pending_reports) >= settings.REPORT_BATCH_SIZE:
+                await self._flush_reports(pending_reports)
+
+            # Keep the slot for a short delay to be respectful of API limits
+            if index < total:
+                await self._sleep(self.SCAN_DELAY_SECONDS)
+
+            return result
+    
+    async def _flush_reports(self, pending_reports: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+        """Bulk insert buffered reports and mark their analysis results stored"""
+        if not pending_reports:
+            return
+        
+        # Take the batch before awaiting so other slots start a fresh buffer
+        batch = pending_reports[:]
+        pending_reports.clear()
+        
+        report_ids = await self.db.store_reports_bulk([row for _, row in batch])
+        if len(report_ids) != len(batch):
+            for result, _ in batch:
+                result["errors"].append("Database storage failed: bulk insert did not complete")
+            return
+        
+        for (result, _), report_id in zip(batch, report_ids):
+            result.update({"success": True, "report_id": report_id})
+    
     async def analyze_website(
         self, 
         website: Dict[str, Any], 
-        strategy: str = "mobile"
+        strategy: str = "mobile",
+        report_buffer: Optional[List[Tuple[Dict[str, Any], Dict[str, Any]]]] = None,
+        scan_date: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Perform complete analysis of a single website
@@ -112,6 +188,9 @@ class WatchtowerCrawler:
         Args:
             website: Website data from database
             strategy: 'mobile' or 'desktop'
+            report_buffer: When given, the report row is appended here for a
+                later bulk insert instead of being stored immediately
+            scan_date: ISO timestamp to record; defaults to now
             
         Returns:
             Analysis results
@@ -119,6 +198,7 @@ class WatchtowerCrawler:
         website_id = website['id']
         url = website['url']
         name = website['name']
+        scan_date = scan_date or datetime.now(timezone.utc).isoformat()
         
         logger.info(f"Analyzing {name} ({url}) with {strategy} strategy")
         
@@ -128,7 +208,7 @@ class WatchtowerCrawler:
             "website_name": name,
             "url": url,
             "strategy": strategy,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": scan_date,
             "success": False,
             "errors": []
         }
@@ -157,25 +237,26 @@ class WatchtowerCrawler:
             # Extract carbon footprint data from PageSpeed results
             carbon_data = pagespeed_data.get('environmental_impact', {})
             
+            # Scores are computed once here and reused for the result
+            report_data = self.db._build_report_data(
+                website_id, strategy, pagespeed_data, ssl_data, carbon_data, scan_date
+            )
+            analysis_result.update({
+                "pagespeed_score": pagespeed_data.get('scores', {}).get('performance', 0),
+                "ssl_score": ssl_data.get('security_score', 0),
+                "carbon_rating": carbon_data.get('rating', 'Unknown'),
+                "overall_score": report_data['overall_score'],
+                "shame_worthy": report_data['shame_worthy']
+            })
+            
+            if report_buffer is not None:
+                report_buffer.append((analysis_result, report_data))
+                return analysis_result
+            
             # Store results in database
             try:
-                report_id = await self.db.store_analysis_report(
-                    website_id=website_id,
-                    strategy=strategy,
-                    pagespeed_data=pagespeed_data,
-                    ssl_data=ssl_data,
-                    carbon_data=carbon_data
-                )
-                
-                analysis_result.update({
-                    "success": True,
-                    "report_id": report_id,
-                    "pagespeed_score": pagespeed_data.get('scores', {}).get('performance', 0),
-                    "ssl_score": ssl_data.get('security_score', 0),
-                    "carbon_rating": carbon_data.get('rating', 'Unknown'),
-                    "overall_score": self.db._calculate_overall_score(pagespeed_data, ssl_data, carbon_data),
-                    "shame_worthy": self.db._determine_shame_worthiness(pagespeed_data, ssl_data, carbon_data)
-                })
+                report_id = await self.db.store_report(report_data)
+                analysis_result.update({"success": True, "report_id": report_id})
                 
                 logger.info(f"✅ Successfully analyzed {name}: Performance={analysis_result['pagespeed_score']}, SSL={analysis_result['ssl_score']}, Carbon={analysis_result['carbon_rating']}")
                 
@@ -192,7 +273,12 @@ class WatchtowerCrawler:
     async def _analyze_pagespeed(self, url: str, strategy: str) -> Dict[str, Any]:
         """Analyze website with PageSpeed Insights"""
         try:
-            result = await self.pagespeed.analyze_url(url, strategy)
+            # PageSpeed reports unreachable sites itself; the optional HEAD
+            # preflight runs before taking a PageSpeed slot
+            if settings.PAGESPEED_PREFLIGHT and not await self.pagespeed.check_url_accessibility(url):
+                raise Exception("Website is not reachable")
+            async with self._pagespeed_semaphore:
+                result = await self.pagespeed.analyze_url(url, strategy, preflight=False)
             if result is None:
                 raise Exception("PageSpeed analysis returned None")
             return result
@@ -203,7 +289,8 @@ class WatchtowerCrawler:
     async def _analyze_ssl(self, url: str) -> Dict[str, Any]:
         """Analyze website SSL configuration"""
         try:
-            result = await self.ssl_checker.check_ssl_comprehensive(url)
+            async with self._ssl_semaphore:
+                result = await self.ssl_checker.check_ssl_comprehensive(url)
             if "error" in result:
                 raise Exception(result["error"])
             return result
@@ -288,18 +375,19 @@ class WatchtowerCrawler:
                 ssl_data = self._get_empty_ssl_data()
             
             carbon_data = pagespeed_data.get('environmental_impact', {})
+            overall_score, shame_worthy = self.db._score_and_shame(pagespeed_data, ssl_data, carbon_data)
             
             return {
                 "url": url,
                 "strategy": strategy,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "success": len(errors) == 0,
                 "errors": errors,
                 "pagespeed": pagespeed_data,
                 "ssl": ssl_data,
                 "carbon": carbon_data,
-                "overall_score": self.db._calculate_overall_score(pagespeed_data, ssl_data, carbon_data),
-                "shame_worthy": self.db._determine_shame_worthiness(pagespeed_data, ssl_data, carbon_data)
+                "overall_score": overall_score,
+                "shame_worthy": shame_worthy
             }
             
         except Exception as e:
@@ -307,7 +395,7 @@ class WatchtowerCrawler:
             return {
                 "url": url,
                 "strategy": strategy,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "success": False,
                 "errors": [str(e)]
             }
\ No newline at end of file
@@ -1,43 +1,249 @@
-from typing import List, Dict, Optional, Any
+import asyncio
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from app.core.cache import ttl_cached, invalidate_caches
 from app.core.config import settings
-from supabase import create_client, Client
+from app.core.http import ORJSONClient
+import httpx
+from postgrest import ReturnMethod
+from supabase import AsyncClient
+from supabase.lib.client_options import AsyncClientOptions
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Report columns embedded in leaderboard and shame wall entries. Leaves out the
+# raw_* JSON blobs, which are often hundreds of KB per report.
+LEADERBOARD_REPORT_COLUMNS = (
+    'id, strategy, scan_date, overall_score, shame_worthy, '
+    'performance_score, accessibility_score, best_practices_score, seo_score, '
+    'ssl_valid, ssl_expired, ssl_days_until_expiry, https_enforced, hsts_enabled, '
+    'ssl_security_score, ssl_shame_worthy, ssl_shame_severity, '
+    'carbon_co2_grams, carbon_rating, shame_reasons'
+)
+
+# Every stored report column except the raw_* JSON blobs, for list and
+# history reads; the blobs are only fetched by get_report_raw
+REPORT_COLUMNS = (
+    'id, website_id, strategy, scan_date, '
+    'performance_score, accessibility_score, best_practices_score, seo_score, pwa_score, '
+    'lcp_field, fid_field, cls_field, inp_field, ttfb_field, fcp_field, '
+    'lcp_lab, speed_index, tti, tbt, cls_lab, fcp_lab, '
+    'total_byte_weight, dom_size, server_response_time, '
+    'ssl_valid, ssl_expired, ssl_days_until_expiry, ssl_issuer, https_enforced, hsts_enabled, '
+    'ssl_security_score, ssl_shame_worthy, ssl_shame_severity, '
+    'carbon_co2_grams, carbon_rating, carbon_percentile, carbon_vs_average, '
+    'carbon_data_transfer, carbon_server_processing, carbon_network_transmission, '
+    'carbon_end_user_device, overall_score, shame_worthy, shame_reasons'
+)
+
+REPORT_RAW_COLUMNS = 'id, raw_pagespeed_data, raw_ssl_data, raw_carbon_data'
+
+# PageSpeed category scores, stored as integers: (column, scores key)
+REPORT_SCORE_FIELDS = (
+    ('performance_score', 'performance'),
+    ('accessibility_score', 'accessibility'),
+    ('best_practices_score', 'best_practices'),
+    ('seo_score', 'seo'),
+    ('pwa_score', 'pwa'),
+)
+
+# Flat schema for the remaining report columns: (input, section, fields),
+# where section is a nested dict of the input (None for top-level keys) and
+# fields are (column, key) pairs. Each section dict is looked up only once.
+REPORT_SECTION_FIELDS = (
+    # Core Web Vitals (field data)
+    ('pagespeed', 'field_data', (
+        ('lcp_field', 'largest_contentful_paint'),
+        ('fid_field', 'first_input_delay'),
+        ('cls_field', 'cumulative_layout_shift'),
+        ('inp_field', 'interaction_to_next_paint'),
+        ('ttfb_field', 'time_to_first_byte'),
+        ('fcp_field', 'first_contentful_paint'),
+    )),
+    # Lab data
+    ('pagespeed', 'lab_data', (
+        ('lcp_lab', 'largest_contentful_paint'),
+        ('speed_index', 'speed_index'),
+        ('tti', 'time_to_interactive'),
+        ('tbt', 'total_blocking_time'),
+        ('cls_lab', 'cumulative_layout_shift'),
+        ('fcp_lab', 'first_contentful_paint'),
+    )),
+    # Additional metrics
+    ('pagespeed', 'metrics', (
+        ('total_byte_weight', 'total_byte_weight'),
+        ('dom_size', 'dom_size'),
+        ('server_response_time', 'server_response_time'),
+    )),
+    # SSL data
+    ('ssl', 'certificate', (
+        ('ssl_valid', 'valid'),
+        ('ssl_expired', 'expired'),
+        ('ssl_days_until_expiry', 'days_until_expiry'),
+        ('ssl_issuer', 'issuer'),
+    )),
+    ('ssl', 'https_redirect', (
+        ('https_enforced', 'enforced'),
+        ('hsts_enabled', 'hsts_enabled'),
+    )),
+    ('ssl', None, (
+        ('ssl_security_score', 'security_score'),
+    )),
+    ('ssl', 'shame_worthy', (
+        ('ssl_shame_worthy', 'worthy'),
+        ('ssl_shame_severity', 'severity'),
+    )),
+    # Carbon footprint
+    ('carbon', None, (
+        ('carbon_co2_grams', 'co2_grams'),
+        ('carbon_rating', 'rating'),
+        ('carbon_percentile', 'percentile'),
+        ('carbon_vs_average', 'vs_average_website'),
+    )),
+    ('carbon', 'breakdown', (
+        ('carbon_data_transfer', 'data_transfer'),
+        ('carbon_server_processing', 'server_processing'),
+        ('carbon_network_transmission', 'network_transmission'),
+        ('carbon_end_user_device', 'end_user_device'),
+    )),
+)
+
+# Website rows with their latest report embedded through the
+# websites.latest_report_id pointer: one query, no per-website lookups
+WEBSITE_WITH_LATEST_REPORT_COLUMNS = (
+    f'*, latest_report:reports!latest_report_id({LEADERBOARD_REPORT_COLUMNS})'
+)
+
+# Report columns the leaderboard may be ordered by. The sort column is spliced
+# into the PostgREST order expression, so only these names are accepted.
+LEADERBOARD_SORT_COLUMNS = frozenset({
+    'overall_score',
+    'performance_score',
+    'accessibility_score',
+    'ssl_security_score',
+    'carbon_rating'
+})
+
 class DatabaseService:
     """Service for database operations using Supabase"""
     
+    MAX_CONNECTIONS = 200
+    
     def __init__(self):
         self.supabase_url = settings.SUPABASE_URL
         self.supabase_key = settings.SUPABASE_KEY
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        # One HTTP/2 connection pool per process, shared by every request
+        # (DatabaseService is a lifespan singleton, see app/services/deps.py)
+        self.http_client = ORJSONClient(
+            http2=True,
+            timeout=httpx.Timeout(120),
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=100,
+                max_connections=self.MAX_CONNECTIONS
+            )
+        )
+        self.supabase: AsyncClient = AsyncClient(
+            self.supabase_url,
+            self.supabase_key,
+            options=AsyncClientOptions(httpx_client=self.http_client)
+        )
+    
+    async def close(self):
+        """Close the shared HTTP connection pool"""
+        await self.http_client.aclose()
+    
+    def get_pool_status(self) -> Dict[str, Any]:
+        """Requests in flight on the shared HTTP pool, and sent since startup"""
+        return {
+            'in_flight': self.http_client.in_flight,
+            'requests_sent': self.http_client.requests_sent,
+            'max_size': self.MAX_CONNECTIONS
+        }
+    
+    async def _execute(self, query):
+        """
+        Run a built Supabase query. Every request goes through here so tests
+        can stub this one method (see tests/test_database.py)
+        """
+        return await query.execute()
         
-    async def get_all_websites(self, active_only: bool = True) -> List[Dict[str, Any]]:
-        """Get all websites from the database"""
+    async def get_all_websites(
+        self,
+        active_only: bool = True,
+        government_level: Optional[str] = None,
+        columns: str = '*'
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all websites from the database, ordered by name. The active-only
+        listing is served in order by the partial websites_active_name_idx.
+        """
         try:
-            query = self.supabase.table('websites').select('*').order('name')
-            
-            if active_only:
-                query = query.eq('is_active', True)
-                
-            response = query.execute()
-            return response.data
+            return await self._fetch_all_websites(active_only, government_level, columns)
         except Exception as e:
             logger.error(f"Failed to fetch websites: {e}")
             return []
     
+    @ttl_cached(ttl=settings.WEBSITES_CACHE_TTL_SECONDS)
+    async def _fetch_all_websites(
+        self,
+        active_only: bool,
+        government_level: Optional[str],
+        columns: str
+    ) -> List[Dict[str, Any]]:
+        """Listing query behind get_all_websites; raises on failure so errors are never cached"""
+        query = self.supabase.table('websites').select(columns).order('name')
+        
+        if active_only:
+            query = query.eq('is_active', True)
+        if government_level:
+            query = query.eq('government_level', government_level)
+            
+        response = await self._execute(query)
+        return response.data
+    
     async def get_website_by_id(self, website_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific website by ID"""
+        """
+        Get a specific website by ID. Rows are cached like get_all_websites
+        and dropped with every other cache when a report is written.
+        """
         try:
-            response = self.supabase.table('websites').select('*').eq('id', website_id).execute()
-            return response.data[0] if response.data else None
+            return await self._fetch_website_by_id(website_id)
         except Exception as e:
             logger.error(f"Failed to fetch website {website_id}: {e}")
             return None
     
+    @ttl_cached(ttl=settings.WEBSITES_CACHE_TTL_SECONDS)
+    async def _fetch_website_by_id(self, website_id: str) -> Optional[Dict[str, Any]]:
+        """Row lookup behind get_website_by_id; raises on failure, so only a real miss caches None"""
+        response = await self._execute(
+            self.supabase.table('websites').select('*').eq('id', website_id)
+        )
+        return response.data[0] if response.data else None
+    
+    async def get_websites_by_ids(self, website_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get several websites in one round trip (id=in.(...), i.e. id = ANY),
+        rather than one get_website_by_id call per ID
+        """
+        if not website_ids:
+            return []
+        try:
+            return await self._fetch_websites_by_ids(list(website_ids))
+        except Exception as e:
+            logger.error(f"Failed to fetch websites {website_ids}: {e}")
+            return []
+    
+    @ttl_cached(ttl=settings.WEBSITES_CACHE_TTL_SECONDS)
+    async def _fetch_websites_by_ids(self, website_ids: List[str]) -> List[Dict[str, Any]]:
+        """Batch lookup behind get_websites_by_ids; raises on failure so errors are never cached"""
+        response = await self._execute(
+            self.supabase.table('websites').select('*').in_('id', website_ids)
+        )
+        return response.data
+    
     async def get_websites_for_crawling(self) -> List[Dict[str, Any]]:
         """Get all active websites that need to be crawled"""
         return await self.get_all_websites(active_only=True)
@@ -48,7 +254,8 @@ class DatabaseService:
         strategy: str,
         pagespeed_data: Dict[str, Any],
         ssl_data: Dict[str, Any],
-        carbon_data: Dict[str, Any]
+        carbon_data: Dict[str, Any],
+        scan_date: Optional[str] = None
     ) -> str:
         """
         Store complete analysis report for a website
@@ -59,320 +266,480 @@ class DatabaseService:
             pagespeed_data: Results from PageSpeed Insights
             ssl_data: Results from SSL checker
             carbon_data: Results from carbon footprint calculator
+            scan_date: ISO timestamp to record; defaults to now
             
         Returns:
             Report ID (UUID)
         """
-        # Calculate overall score
-        overall_score = self._calculate_overall_score(pagespeed_data, ssl_data, carbon_data)
-        shame_worthy = self._determine_shame_worthiness(pagespeed_data, ssl_data, carbon_data)
+        report_data = self._build_report_data(
+            website_id, strategy, pagespeed_data, ssl_data, carbon_data, scan_date
+        )
+        return await self.store_report(report_data)
+    
+    async def store_report(self, report_data: Dict[str, Any]) -> str:
+        """
+        Insert one prepared report row (see _build_report_data)
         
-        report_data = {
-            'website_id': website_id,
-            'strategy': strategy,
-            'scan_date': datetime.utcnow().isoformat(),
-            
-            # PageSpeed scores (convert to integers, database expects int)
-            'performance_score': int(round(pagespeed_data.get('scores', {}).get('performance', 0))),
-            'accessibility_score': int(round(pagespeed_data.get('scores', {}).get('accessibility', 0))),
-            'best_practices_score': int(round(pagespeed_data.get('scores', {}).get('best_practices', 0))),
-            'seo_score': int(round(pagespeed_data.get('scores', {}).get('seo', 0))),
-            'pwa_score': int(round(pagespeed_data.get('scores', {}).get('pwa', 0))),
-            
-            # Core Web Vitals (field data)
-            'lcp_field': pagespeed_data.get('field_data', {}).get('largest_contentful_paint'),
-            'fid_field': pagespeed_data.get('field_data', {}).get('first_input_delay'),
-            'cls_field': pagespeed_data.get('field_data', {}).get('cumulative_layout_shift'),
-            'inp_field': pagespeed_data.get('field_data', {}).get('interaction_to_next_paint'),
-            'ttfb_field': pagespeed_data.get('field_data', {}).get('time_to_first_byte'),
-            'fcp_field': pagespeed_data.get('field_data', {}).get('first_contentful_paint'),
-            
-            # Lab data
-            'lcp_lab': pagespeed_data.get('lab_data', {}).get('largest_contentful_paint'),
-            'speed_index': pagespeed_data.get('lab_data', {}).get('speed_index'),
-            'tti': pagespeed_data.get('lab_data', {}).get('time_to_interactive'),
-            'tbt': pagespeed_data.get('lab_data', {}).get('total_blocking_time'),
-            'cls_lab': pagespeed_data.get('lab_data', {}).get('cumulative_layout_shift'),
-            'fcp_lab': pagespeed_data.get('lab_data', {}).get('first_contentful_paint'),
-            
-            # Additional metrics
-            'total_byte_weight': pagespeed_data.get('metrics', {}).get('total_byte_weight'),
-            'dom_size': pagespeed_data.get('metrics', {}).get('dom_size'),
-            'server_response_time': pagespeed_data.get('metrics', {}).get('server_response_time'),
-            
-            # SSL data
-            'ssl_valid': ssl_data.get('certificate', {}).get('valid'),
-            'ssl_expired': ssl_data.get('certificate', {}).get('expired'),
-            'ssl_days_until_expiry': ssl_data.get('certificate', {}).get('days_until_expiry'),
-            'ssl_issuer': ssl_data.get('certificate', {}).get('issuer'),
-            'https_enforced': ssl_data.get('https_redirect', {}).get('enforced'),
-            'hsts_enabled': ssl_data.get('https_redirect', {}).get('hsts_enabled'),
-            'ssl_security_score': ssl_data.get('security_score'),
-            'ssl_shame_worthy': ssl_data.get('shame_worthy', {}).get('worthy'),
-            'ssl_shame_severity': ssl_data.get('shame_worthy', {}).get('severity'),
-            
-            # Carbon footprint
-            'carbon_co2_grams': carbon_data.get('co2_grams'),
-            'carbon_rating': carbon_data.get('rating'),
-            'carbon_percentile': carbon_data.get('percentile'),
-            'carbon_vs_average': carbon_data.get('vs_average_website'),
-            'carbon_data_transfer': carbon_data.get('breakdown', {}).get('data_transfer'),
-            'carbon_server_processing': carbon_data.get('breakdown', {}).get('server_processing'),
-            'carbon_network_transmission': carbon_data.get('breakdown', {}).get('network_transmission'),
-            'carbon_end_user_device': carbon_data.get('breakdown', {}).get('end_user_device'),
-            
-            # Overall metrics
-            'overall_score': overall_score,
-            'shame_worthy': shame_worthy,
-            
-            # Raw data for debugging
-            'raw_pagespeed_data': pagespeed_data,
-            'raw_ssl_data': ssl_data,
-            'raw_carbon_data': carbon_data
-        }
+        Returns:
+            Report ID (UUID)
+        """
+        website_id = report_data['website_id']
+        # The id is assigned client-side (as in store_reports_bulk), so the
+        # row with its raw_* blobs needn't be echoed back
+        report_id = report_data.setdefault('id', str(uuid.uuid4()))
         
         try:
-            # Insert the report data
-            response = self.supabase.table('reports').insert(report_data).execute()
-            
-            if response.data:
-                report_id = response.data[0]['id']
-                logger.info(f"Stored analysis report {report_id} for website {website_id}")
-                return report_id
-            else:
-                logger.error(f"Failed to store report for website {website_id}")
-                return str(uuid.uuid4())  # Fallback ID
+            await self._execute(
+                self.supabase.table('reports').insert(report_data, returning=ReturnMethod.minimal)
+            )
+            logger.info(f"Stored analysis report {report_id} for website {website_id}")
+            # A new report changes rankings and aggregates
+            invalidate_caches()
+            return report_id
                 
         except Exception as e:
             logger.error(f"Error storing report for website {website_id}: {e}")
             return str(uuid.uuid4())  # Fallback ID
     
-    async def get_latest_reports(self, limit: int = 50) -> List[Dict[str, Any]]:
+    async def store_reports_bulk(self, reports: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insert several prepared report rows (see _build_report_data) in one request
+        
+        Returns:
+            Report IDs in the same order as reports, or an empty list on failure
+        """
+        if not reports:
+            return []
+        
+        # Ids are assigned client-side so PostgREST needn't send any rows back
+        report_ids = [row.setdefault('id', str(uuid.uuid4())) for row in reports]
+        
+        try:
+            # One request is one PostgREST transaction
+            await self._execute(
+                self.supabase.table('reports').insert(reports, returning=ReturnMethod.minimal)
+            )
+            logger.info(f"Stored {len(report_ids)} analysis reports in one batch")
+            invalidate_caches()
+            return report_ids
+        
+        except Exception as e:
+            logger.error(f"Error storing batch of {len(reports)} reports: {e}")
+            return []
+    
+    def _build_report_data(
+        self,
+        website_id: str,
+        strategy: str,
+        pagespeed_data: Dict[str, Any],
+        ssl_data: Dict[str, Any],
+        carbon_data: Dict[str, Any],
+        scan_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Flatten analysis results into a row for the reports table"""
+        # Calculate overall score and shame-worthiness
+        overall_score, shame_worthy = self._score_and_shame(pagespeed_data, ssl_data, carbon_data)
+        
+        report_data = {
+            'website_id': website_id,
+            'strategy': strategy,
+            'scan_date': scan_date or datetime.now(timezone.utc).isoformat()
+        }
+        
+        # PageSpeed scores (convert to integers, database expects int)
+        scores = pagespeed_data.get('scores', {})
+        for column, key in REPORT_SCORE_FIELDS:
+            report_data[column] = int(round(scores.get(key, 0)))
+        
+        inputs = {'pagespeed': pagespeed_data, 'ssl': ssl_data, 'carbon': carbon_data}
+        for source, section, fields in REPORT_SECTION_FIELDS:
+            values = inputs[source]
+            if section is not None:
+                values = values.get(section, {})
+            for column, key in fields:
+                report_data[column] = values.get(key)
+        
+        # Overall metrics
+        report_data['overall_score'] = overall_score
+        report_data['shame_worthy'] = shame_worthy
+        
+        # Raw data for debugging, kept only when explicitly enabled since it
+        # is most of each row's size
+        if settings.STORE_RAW_REPORTS:
+            report_data.update({
+                'raw_pagespeed_data': pagespeed_data,
+                'raw_ssl_data': ssl_data,
+                'raw_carbon_data': carbon_data
+            })
+        
+        return report_data
+    
+    async def get_latest_reports(
+        self,
+        limit: int = 50,
+        columns: str = f'{REPORT_COLUMNS}, websites(name, url)'
+    ) -> List[Dict[str, Any]]:
         """Get latest reports across all websites"""
         try:
-            response = self.supabase.table('reports')\
-                .select('*, websites(name, url)')\
-                .order('scan_date', desc=True)\
-                .limit(limit)\
-                .execute()
-            return response.data
+            return await self._fetch_latest_reports(limit, columns)
         except Exception as e:
             logger.error(f"Failed to fetch latest reports: {e}")
             return []
     
-    async def get_website_reports(self, website_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get reports for a specific website"""
+    @ttl_cached(ttl=settings.WEBSITES_CACHE_TTL_SECONDS)
+    async def _fetch_latest_reports(self, limit: int, columns: str) -> List[Dict[str, Any]]:
+        """Query behind get_latest_reports; raises on failure so errors are never cached"""
+        query = self.supabase.table('reports')\
+            .select(columns)\
+            .order('scan_date', desc=True)\
+            .limit(limit)
+        response = await self._execute(query)
+        return response.data
+    
+    async def get_website_reports(
+        self,
+        website_id: str,
+        limit: int = 10,
+        strategy: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get reports for a specific website, newest first (an index walk on
+        reports_website_scan_idx, or reports_website_strategy_scan_idx when
+        filtering by strategy)
+        """
         try:
-            response = self.supabase.table('reports')\
-                .select('*')\
-                .eq('website_id', website_id)\
+            query = self.supabase.table('reports')\
+                .select(REPORT_COLUMNS)\
+                .eq('website_id', website_id)
+            
+            if strategy:
+                query = query.eq('strategy', strategy)
+                
+            query = query\
                 .order('scan_date', desc=True)\
-                .limit(limit)\
-                .execute()
+                .limit(limit)
+            response = await self._execute(query)
             return response.data
         except Exception as e:
             logger.error(f"Failed to fetch reports for website {website_id}: {e}")
             return []
     
+    async def get_report_raw(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the raw PageSpeed, SSL and carbon payloads stored with a report
+        (null unless it was written with STORE_RAW_REPORTS enabled)
+        """
+        try:
+            response = await self._execute(
+                self.supabase.table('reports').select(REPORT_RAW_COLUMNS).eq('id', report_id)
+            )
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error(f"Failed to fetch raw data for report {report_id}: {e}")
+            return None
+    
+    async def iter_website_reports(
+        self,
+        website_id: str,
+        strategy: Optional[str] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield all reports for a website, newest first, one page of
+        batch_size rows at a time so the full history is never held in memory
+        """
+        offset = 0
+        while True:
+            try:
+                query = self.supabase.table('reports')\
+                    .select(REPORT_COLUMNS)\
+                    .eq('website_id', website_id)
+
+                if strategy:
+                    query = query.eq('strategy', strategy)
+
+                # id breaks scan_date ties so pages never overlap or skip rows
+                query = query\
+                    .order('scan_date', desc=True)\
+                    .order('id', desc=True)\
+                    .range(offset, offset + batch_size - 1)
+                response = await self._execute(query)
+            except Exception as e:
+                logger.error(f"Failed to fetch reports for website {website_id} at offset {offset}: {e}")
+                return
+
+            batch = response.data or []
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            offset += batch_size
+
     async def get_leaderboard(
         self, 
         sort_by: str = 'overall_score',
         government_level: Optional[str] = None,
-        limit: int = 20
+        limit: int = 20,
+        ascending: bool = False,
+        report_filters: Optional[Dict[str, Any]] = None,
+        after_value: Optional[Any] = None,
+        after_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Get leaderboard of government websites with their latest scores
+
+        Each website embeds its latest report through `websites.latest_report_id`
+        (see supabase/migrations), so this is a single round trip and sorting
+        and limiting are done by Postgres. `report_filters` adds equality
+        filters on the latest report's columns.
+
+        Pages are keyset based: pass the sort value and latest report id of the
+        last entry from the previous page as `after_value` / `after_id`.
+
+        Raises ValueError for a sort_by outside LEADERBOARD_SORT_COLUMNS.
         """
+        # Checked before the fallback below, so a bad column is rejected, not an empty page
+        if sort_by not in LEADERBOARD_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
         try:
-            # Get latest report for each website using a subquery approach
-            # This is a complex query, so we'll use RPC or raw SQL if needed
-            
-            # For now, let's use a simpler approach - get all websites and their latest reports
-            websites = await self.get_all_websites(active_only=True)
-            leaderboard = []
-            
-            for website in websites:
-                if government_level and website.get('government_level') != government_level:
-                    continue
-                
-                # Get latest report for this website
-                reports = await self.get_website_reports(website['id'], limit=1)
-                
-                if reports:
-                    report = reports[0]
-                    leaderboard.append({
-                        **website,
-                        'latest_report': report,
-                        'overall_score': report.get('overall_score', 0),
-                        'performance_score': report.get('performance_score', 0),
-                        'ssl_security_score': report.get('ssl_security_score', 0),
-                        'scan_date': report.get('scan_date')
-                    })
-            
-            # Sort by the specified column
-            leaderboard.sort(key=lambda x: x.get(sort_by, 0), reverse=True)
-            
-            return leaderboard[:limit]
-            
+            return await self._fetch_leaderboard(
+                sort_by, government_level, limit, ascending, report_filters, after_value, after_id
+            )
         except Exception as e:
             logger.error(f"Failed to fetch leaderboard: {e}")
             return []
     
-    async def get_shame_wall(self, severity: Optional[str] = None) -> List[Dict[str, Any]]:
+    @ttl_cached(ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS)
+    async def _fetch_leaderboard(
+        self,
+        sort_by: str,
+        government_level: Optional[str],
+        limit: int,
+        ascending: bool,
+        report_filters: Optional[Dict[str, Any]],
+        after_value: Optional[Any],
+        after_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Leaderboard query behind get_leaderboard; raises on failure so errors are never cached"""
+        query = self.supabase.table('websites')\
+            .select(f'*, latest_report:reports!latest_report_id!inner({LEADERBOARD_REPORT_COLUMNS})')\
+            .eq('is_active', True)
+        
+        if government_level:
+            query = query.eq('government_level', government_level)
+        for column, value in (report_filters or {}).items():
+            query = query.eq(f'latest_report.{column}', value)
+        if after_id is not None:
+            query = query.or_(
+                self._keyset_filter(sort_by, ascending, after_value, after_id),
+                reference_table='latest_report'
+            )
+        
+        query = query\
+            .order(f'latest_report({sort_by})', desc=not ascending, nullsfirst=False)\
+            .order('latest_report(id)', desc=not ascending)\
+            .limit(limit)
+        response = await self._execute(query)
+        
+        # Rows arrive sorted and limited; lift the headline report fields
+        # onto each freshly decoded row in place rather than copying it
+        leaderboard = response.data
+        for website in leaderboard:
+            report = website['latest_report']
+            website['overall_score'] = report.get('overall_score', 0)
+            website['performance_score'] = report.get('performance_score', 0)
+            website['ssl_security_score'] = report.get('ssl_security_score', 0)
+            website['scan_date'] = report.get('scan_date')
+        
+        return leaderboard
+    
+    async def get_shame_wall(
+        self,
+        severity: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
         """Get websites that are shame-worthy"""
         try:
-            # Get leaderboard and filter for shame-worthy sites
-            leaderboard = await self.get_leaderboard(sort_by='overall_score', limit=100)
-            
-            shame_wall = []
-            for entry in leaderboard:
-                report = entry.get('latest_report', {})
-                if report.get('shame_worthy'):
-                    if not severity or report.get('ssl_shame_severity') == severity:
-                        shame_wall.append({
-                            **entry,
-                            'shame_reasons': self._get_shame_reasons(report)
-                        })
-            
-            return shame_wall
-            
+            return await self._fetch_shame_wall(severity, limit)
         except Exception as e:
             logger.error(f"Failed to fetch shame wall: {e}")
             return []
     
+    @ttl_cached(ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS)
+    async def _fetch_shame_wall(self, severity: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Shame wall query behind get_shame_wall; raises on failure so errors are never cached"""
+        # Filter and limit in Postgres so only the rows shown are fetched
+        report_filters = {'shame_worthy': True}
+        if severity:
+            report_filters['ssl_shame_severity'] = severity
+            
+        leaderboard = await self._fetch_leaderboard(
+            'overall_score', None, limit, False, report_filters, None, None
+        )
+        
+        return [
+            # Reasons come from the generated reports.shame_reasons column
+            {**entry, 'shame_reasons': entry['latest_report'].get('shame_reasons') or []}
+            for entry in leaderboard
+        ]
+    
     async def get_website_statistics(self) -> Dict[str, Any]:
-        """Get overall statistics about monitored websites"""
+        """
+        Get overall statistics about monitored websites, aggregated in a
+        single Postgres statement (`website_statistics` RPC). `updated_at`
+        says when the (cached) aggregates were computed.
+        """
         try:
-            # Get basic counts
-            websites = await self.get_all_websites(active_only=False)
-            active_websites = [w for w in websites if w.get('is_active', True)]
-            
-            # Get reports statistics
-            latest_reports = await self.get_latest_reports(limit=1000)  # Get more for stats
-            
-            shame_worthy_count = len([r for r in latest_reports if r.get('shame_worthy')])
-            ssl_issues_count = len([r for r in latest_reports if not r.get('ssl_valid')])
-            
-            # Calculate average scores
-            valid_scores = [r.get('overall_score', 0) for r in latest_reports if r.get('overall_score', 0) > 0]
-            avg_score = sum(valid_scores) / len(valid_scores) if valid_scores else 0
-            
-            # Get latest scan date
-            latest_scan = max([r.get('scan_date') for r in latest_reports if r.get('scan_date')], default=None)
-            
-            return {
-                'total_websites': len(websites),
-                'active_websites': len(active_websites),
-                'total_reports': len(latest_reports),
-                'average_overall_score': round(avg_score, 2),
-                'shame_worthy_count': shame_worthy_count,
-                'ssl_issues_count': ssl_issues_count,
-                'latest_scan_date': latest_scan
-            }
-            
+            return await self._fetch_website_statistics()
         except Exception as e:
             logger.error(f"Failed to fetch statistics: {e}")
             return {
                 'total_websites': 0,
+                'active_websites': 0,
                 'total_reports': 0,
                 'average_overall_score': 0,
                 'shame_worthy_count': 0,
                 'ssl_issues_count': 0,
-                'latest_scan_date': None
+                'latest_scan_date': None,
+                'updated_at': datetime.now(timezone.utc)
             }
     
-    def _get_shame_reasons(self, report: Dict[str, Any]) -> List[str]:
-        """Extract shame reasons from a report"""
-        reasons = []
-        
-        if report.get('ssl_expired'):
-            reasons.append("Expired SSL certificate")
-        elif not report.get('ssl_valid'):
-            reasons.append("Invalid SSL certificate")
-        elif not report.get('https_enforced'):
-            reasons.append("HTTPS not enforced")
-            
-        performance = report.get('performance_score', 100)
-        if performance < 30:
-            reasons.append(f"Very poor performance ({performance}/100)")
-            
-        accessibility = report.get('accessibility_score', 100)
-        if accessibility < 50:
-            reasons.append(f"Poor accessibility ({accessibility}/100)")
-            
-        return reasons
+    @ttl_cached(ttl=settings.STATISTICS_CACHE_TTL_SECONDS)
+    async def _fetch_website_statistics(self) -> Dict[str, Any]:
+        """Statistics RPC behind get_website_statistics; raises on failure so errors are never cached"""
+        response = await self._execute(self.supabase.rpc('website_statistics'))
+        stats = response.data or {}
+        stats['average_overall_score'] = round(stats.get('average_overall_score') or 0, 2)
+        # Stamped once per cache refresh, not per request
+        stats['updated_at'] = datetime.now(timezone.utc)
+        return stats
     
-    def _calculate_overall_score(
-        self, 
+    async def get_dashboard_stats(self, performers_limit: int = 5) -> Dict[str, Any]:
+        """
+        Get dashboard aggregates computed by Postgres (`dashboard_stats` RPC)
+        plus the top and bottom performers as two small ordered queries.
+        The three requests are independent and run concurrently.
+
+        Raises if the aggregates can't be fetched, so the cached /stats
+        responses are never built from an empty result.
+        """
+        async def fetch_stats() -> Dict[str, Any]:
+            try:
+                response = await self._execute(self.supabase.rpc('dashboard_stats'))
+            except Exception as e:
+                logger.error(f"Failed to fetch dashboard statistics: {e}")
+                raise
+            return response.data or {}
+
+        if not performers_limit:
+            stats = await fetch_stats()
+            stats['top_performers'] = []
+            stats['bottom_performers'] = []
+            return stats
+
+        stats, top_performers, bottom_performers = await asyncio.gather(
+            fetch_stats(),
+            self.get_leaderboard(limit=performers_limit),
+            self.get_leaderboard(limit=performers_limit, ascending=True)
+        )
+        stats['top_performers'] = top_performers
+        stats['bottom_performers'] = bottom_performers
+
+        return stats
+
+    def _keyset_filter(
+        self,
+        sort_by: str,
+        ascending: bool,
+        after_value: Optional[Any],
+        after_id: str
+    ) -> str:
+        """
+        PostgREST `or` filter selecting rows that sort after the cursor
+        (sort_by, id), with NULL sort values last in either direction
+        """
+        op = 'gt' if ascending else 'lt'
+        after_id = self._quote_filter_value(after_id)
+        if after_value is None:
+            return f'and({sort_by}.is.null,id.{op}.{after_id})'
+        after_value = self._quote_filter_value(after_value)
+        return (
+            f'{sort_by}.{op}.{after_value},'
+            f'and({sort_by}.eq.{after_value},id.{op}.{after_id}),'
+            f'{sort_by}.is.null'
+        )
+    
+    def _quote_filter_value(self, value: Any) -> str:
+        """
+        Quote a value for a PostgREST logic-tree filter, so commas, dots and
+        parentheses in client input stay part of the value
+        """
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}"'
+    
+    @staticmethod
+    def _score_and_shame(
         pagespeed_data: Dict[str, Any],
-        ssl_data: Dict[str, Any], 
+        ssl_data: Dict[str, Any],
         carbon_data: Dict[str, Any]
-    ) -> float:
-        """Calculate overall score from all metrics"""
-        scores = []
+    ) -> Tuple[float, bool]:
+        """
+        Calculate the overall score and shame-worthiness from all metrics,
+        reading each input value once
+
+        Returns:
+            (overall_score, shame_worthy)
+        """
+        scores = pagespeed_data.get('scores', {})
+        performance = scores.get('performance')
+        accessibility = scores.get('accessibility')
+        ssl_score = ssl_data.get('security_score', 0)
+        carbon_percentile = carbon_data.get('percentile')
+        
+        # Shame-worthy: SSL issues are immediate shame, then very poor
+        # performance or accessibility, or a bottom 10% carbon footprint.
+        # Missing values never make a site shame-worthy on their own.
+        shame_worthy = bool(
+            ssl_data.get('shame_worthy', {}).get('worthy', False)
+            or (performance if performance is not None else 100) < 30
+            or (accessibility if accessibility is not None else 100) < 50
+            or (carbon_percentile if carbon_percentile is not None else 100) < 10
+        )
+        
+        # Missing values count as 0 towards the score. Terms are summed with
+        # sum(), whose compensated float addition the stored scores rely on
+        performance = performance or 0
+        accessibility = accessibility or 0
+        carbon_percentile = carbon_percentile or 0
+        terms = []
         weights = []
         
         # PageSpeed scores (weight: 40%)
-        performance = pagespeed_data.get('scores', {}).get('performance', 0)
-        accessibility = pagespeed_data.get('scores', {}).get('accessibility', 0)
-        best_practices = pagespeed_data.get('scores', {}).get('best_practices', 0)
-        seo = pagespeed_data.get('scores', {}).get('seo', 0)
-        
         if performance > 0:
-            scores.extend([performance, accessibility, best_practices, seo])
-            weights.extend([0.15, 0.10, 0.10, 0.05])  # Total: 40%
+            terms += (
+                performance * 0.15,
+                accessibility * 0.10,
+                scores.get('best_practices', 0) * 0.10,
+                scores.get('seo', 0) * 0.05
+            )
+            weights += (0.15, 0.10, 0.10, 0.05)
         
         # SSL security score (weight: 30%)
-        ssl_score = ssl_data.get('security_score', 0)
         if ssl_score > 0:
-            scores.append(ssl_score)
+            terms.append(ssl_score * 0.30)
             weights.append(0.30)
         
-        # Carbon footprint score (weight: 20%) - convert percentile to 0-100 score
-        carbon_percentile = carbon_data.get('percentile', 0)
+        # Carbon footprint score (weight: 20%) - percentile is already 0-100
         if carbon_percentile > 0:
-            scores.append(carbon_percentile)
+            terms.append(carbon_percentile * 0.20)
             weights.append(0.20)
         
         # Mobile-friendliness bonus (weight: 10%)
         # This could be derived from accessibility and performance scores
-        mobile_bonus = min(performance, accessibility) if performance > 0 and accessibility > 0 else 0
-        if mobile_bonus > 0:
-            scores.append(mobile_bonus)
+        if performance > 0 and accessibility > 0:
+            terms.append(min(performance, accessibility) * 0.10)
             weights.append(0.10)
         
-        # Calculate weighted average
-        if scores and weights:
-            weighted_sum = sum(score * weight for score, weight in zip(scores, weights))
-            total_weight = sum(weights)
-            return round(weighted_sum / total_weight, 2) if total_weight > 0 else 0
-        
-        return 0
-    
-    def _determine_shame_worthiness(
-        self,
-        pagespeed_data: Dict[str, Any],
-        ssl_data: Dict[str, Any],
-        carbon_data: Dict[str, Any]
-    ) -> bool:
-        """Determine if a website is shame-worthy based on all metrics"""
-        # SSL issues are immediate shame
-        if ssl_data.get('shame_worthy', {}).get('worthy', False):
-            return True
-        
-        # Very poor performance
-        performance = pagespeed_data.get('scores', {}).get('performance', 100)
-        if performance < 30:
-            return True
-        
-        # Very poor accessibility 
-        accessibility = pagespeed_data.get('scores', {}).get('accessibility', 100)
-        if accessibility < 50:
-            return True
-        
-        # Terrible carbon footprint (bottom 10%)
-        carbon_percentile = carbon_data.get('percentile', 100)
-        if carbon_percentile < 10:
-            return True
-        
-        return False
\ No newline at end of file
+        total_weight = sum(weights)
+        overall_score = round(sum(terms) / total_weight, 2) if total_weight > 0 else 0
+        return overall_score, shame_worthy
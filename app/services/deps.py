@@ -0,0 +1,51 @@
+from typing import Optional
+
+from app.services.crawler import WatchtowerCrawler
+from app.services.database import DatabaseService
+
+# Process-wide service instances, created once in the app lifespan so every
+# router shares the same Supabase client and its connection pool
+_db_service: Optional[DatabaseService] = None
+_crawler: Optional[WatchtowerCrawler] = None
+
+
+def init_services():
+    """
+    Create the shared service instances (called from the app lifespan)
+    """
+    global _db_service, _crawler
+    if _db_service is None:
+        _db_service = DatabaseService()
+    if _crawler is None:
+        _crawler = WatchtowerCrawler(db=_db_service)
+
+
+async def close_services():
+    """
+    Release the shared service instances (called on app shutdown)
+    """
+    global _db_service, _crawler
+    if _crawler is not None:
+        await _crawler.close()
+    if _db_service is not None:
+        await _db_service.close()
+    _db_service = None
+    _crawler = None
+
+
+async def get_db() -> DatabaseService:
+    """
+    FastAPI dependency returning the shared DatabaseService
+    """
+    if _db_service is None:
+        init_services()
+    return _db_service
+
+
+async def get_crawler() -> WatchtowerCrawler:
+    """
+    FastAPI dependency returning the shared WatchtowerCrawler
+    """
+    if _crawler is None:
+        init_services()
+    return _crawler
@@ -1,24 +1,97 @@
 import httpx
 import asyncio
+import random
+import orjson
 from typing import Dict, Optional, Any
 from urllib.parse import quote
 from app.core.config import settings
+from app.core.http import RateLimiter, http_client
 from app.services.carbon_footprint import CarbonFootprintCalculator
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Lighthouse runtime errors meaning the page itself could not be loaded
+UNREACHABLE_RUNTIME_ERRORS = frozenset({
+    'DNS_FAILURE',
+    'FAILED_DOCUMENT_REQUEST',
+    'ERRORED_DOCUMENT_REQUEST',
+    'NO_FCP'
+})
+
+# Transient PSI responses worth retrying (rate limited or server side)
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Lighthouse categories requested on every PageSpeed query
+QUERY_CATEGORIES = ("performance", "accessibility", "best-practices", "seo", "pwa")
+
+# Extraction tables for _extract_result: (result key, PageSpeed id)
+CATEGORY_SCORES = (
+    ('performance', 'performance'),
+    ('accessibility', 'accessibility'),
+    ('best_practices', 'best-practices'),
+    ('seo', 'seo'),
+    ('pwa', 'pwa'),
+)
+
+# Core Web Vitals from loadingExperience (field data from real users)
+FIELD_METRICS = (
+    ('first_contentful_paint', 'FIRST_CONTENTFUL_PAINT'),
+    ('first_input_delay', 'FIRST_INPUT_DELAY'),
+    ('largest_contentful_paint', 'LARGEST_CONTENTFUL_PAINT'),
+    ('cumulative_layout_shift', 'CUMULATIVE_LAYOUT_SHIFT'),
+    ('interaction_to_next_paint', 'INTERACTION_TO_NEXT_PAINT'),
+    ('time_to_first_byte', 'EXPERIMENTAL_TIME_TO_FIRST_BYTE'),
+)
+
+# Lighthouse audits read by numericValue
+LAB_AUDITS = (
+    ('first_contentful_paint', 'first-contentful-paint'),
+    ('speed_index', 'speed-index'),
+    ('largest_contentful_paint', 'largest-contentful-paint'),
+    ('time_to_interactive', 'interactive'),
+    ('total_blocking_time', 'total-blocking-time'),
+    ('cumulative_layout_shift', 'cumulative-layout-shift'),
+)
+
+METRIC_AUDITS = (
+    ('total_byte_weight', 'total-byte-weight'),
+    ('dom_size', 'dom-size'),
+    ('max_potential_fid', 'max-potential-fid'),
+    ('server_response_time', 'server-response-time'),
+    ('main_thread_work', 'mainthread-work-breakdown'),
+    ('bootup_time', 'bootup-time'),
+)
+
+# Counters in the first item of the diagnostics audit
+DIAGNOSTIC_COUNTS = (
+    ('num_requests', 'numRequests'),
+    ('num_scripts', 'numScripts'),
+    ('num_stylesheets', 'numStylesheets'),
+    ('num_fonts', 'numFonts'),
+)
+
 class PageSpeedInsights:
-    def __init__(self):
+    # The PSI quota belongs to the API key, so every instance shares one limiter
+    _limiter = RateLimiter(settings.PAGESPEED_REQUESTS_PER_MINUTE)
+    
+    MAX_ATTEMPTS = 4
+    MAX_RETRY_DELAY_SECONDS = 30
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client
         self.api_key = settings.GOOGLE_PAGESPEED_API_KEY
         self.base_url = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+        self._query_suffixes: Dict[str, str] = {}
         self.carbon_calculator = CarbonFootprintCalculator()
         
     async def check_url_accessibility(self, url: str) -> bool:
         """Check if URL is accessible before making API call"""
         try:
-            async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
-                response = await client.head(url)
+            async with http_client(self.client) as client:
+                response = await client.head(
+                    url, follow_redirects=True, timeout=settings.PREFLIGHT_TIMEOUT_SECONDS
+                )
                 return response.status_code < 400
         except Exception as e:
             logger.error(f"Error accessing URL {url}: {e}")
@@ -26,28 +99,28 @@ class PageSpeedInsights:
     
     def create_query_url(self, url: str, strategy: str = "mobile") -> str:
         """Create the PageSpeed Insights API query URL"""
-        params = {
-            "url": quote(url),
-            "key": self.api_key,
-            "strategy": strategy,
-            "category": ["performance", "accessibility", "best-practices", "seo", "pwa"]
-        }
-        
-        # Build query string with multiple categories
-        query_parts = [f"url={params['url']}", f"key={params['key']}", f"strategy={params['strategy']}"]
-        for category in params['category']:
-            query_parts.append(f"category={category}")
+        # Everything after the site URL is fixed per strategy, so it is
+        # built once and reused for every site
+        suffix = self._query_suffixes.get(strategy)
+        if suffix is None:
+            categories = "&".join(f"category={category}" for category in QUERY_CATEGORIES)
+            suffix = f"key={self.api_key}&strategy={strategy}&{categories}"
+            self._query_suffixes[strategy] = suffix
             
-        return f"{self.base_url}?{'&'.join(query_parts)}"
+        return f"{self.base_url}?url={quote(url)}&{suffix}"
     
-    async def analyze_url(self, url: str, strategy: str = "mobile") -> Optional[Dict[str, Any]]:
+    async def analyze_url(
+        self, url: str, strategy: str = "mobile", preflight: bool = True
+    ) -> Optional[Dict[str, Any]]:
         """
         Analyze a URL using PageSpeed Insights API
         Returns comprehensive performance data including Core Web Vitals
+
+        Pass preflight=False when the caller has already checked the URL
+        with check_url_accessibility.
         """
         # Check URL accessibility first
-        is_accessible = await self.check_url_accessibility(url)
-        if not is_accessible:
+        if preflight and not await self.check_url_accessibility(url):
             logger.warning(f"URL {url} is not accessible")
             return None
             
@@ -55,103 +128,121 @@ class PageSpeedInsights:
         logger.info(f"Analyzing {url} with strategy: {strategy}")
         
         try:
-            # Add delay to respect rate limits
-            await asyncio.sleep(1)
-            
-            async with httpx.AsyncClient(timeout=90.0) as client:
-                response = await client.get(api_endpoint)
-                response.raise_for_status()
-                data = response.json()
-                
-            # Extract comprehensive metrics
-            lighthouse = data.get('lighthouseResult', {})
-            loading_exp = data.get('loadingExperience', {})
-            
-            # Core Web Vitals from field data (real user data)
-            field_metrics = loading_exp.get('metrics', {})
-            
-            # Extract all scores
-            categories = lighthouse.get('categories', {})
-            
-            # Extract detailed metrics
-            audits = lighthouse.get('audits', {})
-            
-            result = {
-                "url": url,
-                "strategy": strategy,
-                "final_url": lighthouse.get('finalUrl', url),
-                "fetch_time": lighthouse.get('fetchTime'),
-                
-                # Category scores (0-100)
-                "scores": {
-                    "performance": categories.get('performance', {}).get('score', 0) * 100 if categories.get('performance', {}).get('score') else 0,
-                    "accessibility": categories.get('accessibility', {}).get('score', 0) * 100 if categories.get('accessibility', {}).get('score') else 0,
-                    "best_practices": categories.get('best-practices', {}).get('score', 0) * 100 if categories.get('best-practices', {}).get('score') else 0,
-                    "seo": categories.get('seo', {}).get('score', 0) * 100 if categories.get('seo', {}).get('score') else 0,
-                    "pwa": categories.get('pwa', {}).get('score', 0) * 100 if categories.get('pwa', {}).get('score') else 0,
-                },
+            for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                async with self._limiter, http_client(self.client) as client:
+                    response = await client.get(api_endpoint, timeout=90.0)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.MAX_ATTEMPTS:
+                    break
+                delay = self._retry_delay(response, attempt)
+                logger.warning(
+                    f"PageSpeed returned {response.status_code} for {url}, "
+                    f"retrying in {delay:.1f}s (attempt {attempt}/{self.MAX_ATTEMPTS})"
+                )
+                await asyncio.sleep(delay)
+            response.raise_for_status()
                 
-                # Core Web Vitals (field data from real users)
-                "field_data": {
-                    "first_contentful_paint": field_metrics.get('FIRST_CONTENTFUL_PAINT', {}).get('percentile'),
-                    "first_input_delay": field_metrics.get('FIRST_INPUT_DELAY', {}).get('percentile'),
-                    "largest_contentful_paint": field_metrics.get('LARGEST_CONTENTFUL_PAINT', {}).get('percentile'),
-                    "cumulative_layout_shift": field_metrics.get('CUMULATIVE_LAYOUT_SHIFT', {}).get('percentile'),
-                    "interaction_to_next_paint": field_metrics.get('INTERACTION_TO_NEXT_PAINT', {}).get('percentile'),
-                    "time_to_first_byte": field_metrics.get('EXPERIMENTAL_TIME_TO_FIRST_BYTE', {}).get('percentile'),
-                },
-                
-                # Lab data (from Lighthouse simulation)
-                "lab_data": {
-                    "first_contentful_paint": audits.get('first-contentful-paint', {}).get('numericValue'),
-                    "speed_index": audits.get('speed-index', {}).get('numericValue'),
-                    "largest_contentful_paint": audits.get('largest-contentful-paint', {}).get('numericValue'),
-                    "time_to_interactive": audits.get('interactive', {}).get('numericValue'),
-                    "total_blocking_time": audits.get('total-blocking-time', {}).get('numericValue'),
-                    "cumulative_layout_shift": audits.get('cumulative-layout-shift', {}).get('numericValue'),
-                },
-                
-                # Additional metrics
-                "metrics": {
-                    "total_byte_weight": audits.get('total-byte-weight', {}).get('numericValue'),
-                    "dom_size": audits.get('dom-size', {}).get('numericValue'),
-                    "max_potential_fid": audits.get('max-potential-fid', {}).get('numericValue'),
-                    "server_response_time": audits.get('server-response-time', {}).get('numericValue'),
-                    "main_thread_work": audits.get('mainthread-work-breakdown', {}).get('numericValue'),
-                    "bootup_time": audits.get('bootup-time', {}).get('numericValue'),
-                },
-                
-                # Resource details
-                "resources": {
-                    "total_requests": len(lighthouse.get('audits', {}).get('network-requests', {}).get('details', {}).get('items', [])) if lighthouse.get('audits', {}).get('network-requests') else 0,
-                    "third_party_summary": audits.get('third-party-summary', {}).get('details', {}),
-                },
-                
-                # Diagnostics
-                "diagnostics": {
-                    "num_requests": audits.get('diagnostics', {}).get('details', {}).get('items', [{}])[0].get('numRequests') if audits.get('diagnostics') else None,
-                    "num_scripts": audits.get('diagnostics', {}).get('details', {}).get('items', [{}])[0].get('numScripts') if audits.get('diagnostics') else None,
-                    "num_stylesheets": audits.get('diagnostics', {}).get('details', {}).get('items', [{}])[0].get('numStylesheets') if audits.get('diagnostics') else None,
-                    "num_fonts": audits.get('diagnostics', {}).get('details', {}).get('items', [{}])[0].get('numFonts') if audits.get('diagnostics') else None,
-                },
-                
-                # Enhanced carbon footprint calculation (website-wide)
-                "environmental_impact": self._calculate_enhanced_carbon_footprint(
-                    audits.get('total-byte-weight', {}).get('numericValue', 0),
-                    audits.get('server-response-time', {}).get('numericValue'),
-                    url
-                ),
-            }
-            
-            return result
+            # Lighthouse payloads run to several MB; parse them on a worker
+            # thread so the event loop keeps serving requests meanwhile
+            return await asyncio.to_thread(self._extract_result, response.content, url, strategy)
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error for {url}: {e}")
+            # PSI answers 400 when Lighthouse could not load the page at all
+            if e.response.status_code == 400:
+                logger.warning(f"URL {url} is not accessible")
+            else:
+                logger.error(f"HTTP error for {url}: {e}")
             return None
         except Exception as e:
             logger.error(f"Error analyzing {url}: {e}")
             return None
     
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait before retrying: Retry-After if given, else jittered backoff"""
+        retry_after = response.headers.get('retry-after', '')
+        if retry_after.isdigit():
+            return min(float(retry_after), self.MAX_RETRY_DELAY_SECONDS)
+        return min(2 ** (attempt - 1) + random.uniform(0, 1), self.MAX_RETRY_DELAY_SECONDS)
+    
+    def _extract_result(self, payload: bytes, url: str, strategy: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse a PageSpeed Insights response body into the metrics we store,
+        or None when Lighthouse could not load the page
+        """
+        data = orjson.loads(payload)
+        
+        # Extract comprehensive metrics
+        lighthouse = data.get('lighthouseResult', {})
+        runtime_error = lighthouse.get('runtimeError', {}).get('code')
+        if runtime_error in UNREACHABLE_RUNTIME_ERRORS:
+            logger.warning(f"URL {url} is not accessible ({runtime_error})")
+            return None
+        loading_exp = data.get('loadingExperience', {})
+        
+        # Core Web Vitals from field data (real user data)
+        field_metrics = loading_exp.get('metrics', {})
+        
+        # Extract all scores
+        categories = lighthouse.get('categories', {})
+        
+        # Extract detailed metrics
+        audits = lighthouse.get('audits', {})
+        
+        diagnostics = audits.get('diagnostics')
+        diagnostic_item = diagnostics.get('details', {}).get('items', [{}])[0] if diagnostics else None
+        
+        # Missing entries fall back through `or {}`, which only allocates on a miss
+        result = {
+            "url": url,
+            "strategy": strategy,
+            "final_url": lighthouse.get('finalUrl', url),
+            "fetch_time": lighthouse.get('fetchTime'),
+            
+            # Category scores (0-100)
+            "scores": {
+                key: score * 100 if (score := (categories.get(category) or {}).get('score')) else 0
+                for key, category in CATEGORY_SCORES
+            },
+            
+            # Core Web Vitals (field data from real users)
+            "field_data": {
+                key: (field_metrics.get(metric) or {}).get('percentile')
+                for key, metric in FIELD_METRICS
+            },
+            
+            # Lab data (from Lighthouse simulation)
+            "lab_data": {
+                key: (audits.get(audit) or {}).get('numericValue')
+                for key, audit in LAB_AUDITS
+            },
+            
+            # Additional metrics
+            "metrics": {
+                key: (audits.get(audit) or {}).get('numericValue')
+                for key, audit in METRIC_AUDITS
+            },
+            
+            # Resource details
+            "resources": {
+                "total_requests": len(lighthouse.get('audits', {}).get('network-requests', {}).get('details', {}).get('items', [])) if lighthouse.get('audits', {}).get('network-requests') else 0,
+                "third_party_summary": audits.get('third-party-summary', {}).get('details', {}),
+            },
+            
+            # Diagnostics
+            "diagnostics": {
+                key: diagnostic_item.get(field) if diagnostics else None
+                for key, field in DIAGNOSTIC_COUNTS
+            },
+            
+            # Enhanced carbon footprint calculation (website-wide)
+            "environmental_impact": self._calculate_enhanced_carbon_footprint(
+                audits.get('total-byte-weight', {}).get('numericValue', 0),
+                audits.get('server-response-time', {}).get('numericValue'),
+                url
+            ),
+        }
+        
+        return result
+    
     def _calculate_enhanced_carbon_footprint(
         self,
         total_bytes: int,
@@ -1,6 +1,8 @@
 import asyncio
 import logging
-from datetime import datetime
+import threading
+from typing import Optional
+from datetime import datetime, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
@@ -22,9 +24,16 @@ class WatchtowerScheduler:
     - Logging and monitoring
     """
 
-    def __init__(self):
-        self.scheduler = AsyncIOScheduler()
-        self.crawler = WatchtowerCrawler()
+    def __init__(self, crawler: Optional[WatchtowerCrawler] = None):
+        # A late wakeup (e.g. a busy event loop at 2 AM) still runs the scan
+        # within the grace window instead of skipping the week, and missed
+        # runs collapse into one instead of queueing several full scans
+        self.scheduler = AsyncIOScheduler(job_defaults={
+            'coalesce': True,
+            'misfire_grace_time': 3600,
+            'max_instances': 1
+        })
+        self.crawler = crawler or WatchtowerCrawler()
         self.is_running = False
 
     async def weekly_scan_job(self):
@@ -37,18 +46,15 @@ class WatchtowerScheduler:
         logger.info("=" * 80)
 
         try:
-            # Scan with mobile strategy first
-            logger.info("📱 Starting mobile scan...")
-            mobile_result = await self.crawler.crawl_all_websites(strategy="mobile")
+            # Run both strategies at once. They share the crawler's scan and
+            # PageSpeed semaphores, so together they stay within the same
+            # concurrency (and API rate) limits as a single scan
+            logger.info("📱💻 Starting mobile and desktop scans...")
+            mobile_result, desktop_result = await asyncio.gather(
+                self.crawler.crawl_all_websites(strategy="mobile"),
+                self.crawler.crawl_all_websites(strategy="desktop")
+            )
             logger.info(f"📱 Mobile scan completed: {mobile_result.get('websites_crawled', 0)} websites analyzed")
-
-            # Wait a bit between scans to avoid rate limiting
-            logger.info("⏳ Waiting 60 seconds before desktop scan...")
-            await asyncio.sleep(60)
-
-            # Scan with desktop strategy
-            logger.info("💻 Starting desktop scan...")
-            desktop_result = await self.crawler.crawl_all_websites(strategy="desktop")
             logger.info(f"💻 Desktop scan completed: {desktop_result.get('websites_crawled', 0)} websites analyzed")
 
             # Log summary
@@ -56,14 +62,14 @@ class WatchtowerScheduler:
             logger.info("✅ Weekly scan completed successfully")
             logger.info(f"   Mobile: {mobile_result.get('websites_crawled', 0)}/{mobile_result.get('total_websites', 0)} websites")
             logger.info(f"   Desktop: {desktop_result.get('websites_crawled', 0)}/{desktop_result.get('total_websites', 0)} websites")
-            logger.info(f"   Total duration: {mobile_result.get('duration_seconds', 0) + desktop_result.get('duration_seconds', 0):.2f} seconds")
+            logger.info(f"   Total duration: {max(mobile_result.get('duration_seconds', 0), desktop_result.get('duration_seconds', 0)):.2f} seconds")
             logger.info("=" * 80)
 
             return {
                 "status": "completed",
                 "mobile_result": mobile_result,
                 "desktop_result": desktop_result,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.now(timezone.utc).isoformat()
             }
 
         except Exception as e:
@@ -71,14 +77,14 @@ class WatchtowerScheduler:
             return {
                 "status": "failed",
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.now(timezone.utc).isoformat()
             }
 
     def start(self):
         """
         Start the scheduler with configured jobs
         """
-        if self.is_running:
+        if self.is_running or self.scheduler.running:
             logger.warning("Scheduler is already running")
             return
 
@@ -183,13 +189,16 @@ class WatchtowerScheduler:
 
 # Global scheduler instance
 _scheduler_instance = None
+_scheduler_lock = threading.Lock()
 
 
-def get_scheduler() -> WatchtowerScheduler:
+def get_scheduler(crawler: Optional[WatchtowerCrawler] = None) -> WatchtowerScheduler:
     """
     Get or create the global scheduler instance
     """
     global _scheduler_instance
     if _scheduler_instance is None:
-        _scheduler_instance = WatchtowerScheduler()
+        with _scheduler_lock:
+            if _scheduler_instance is None:
+                _scheduler_instance = WatchtowerScheduler(crawler=crawler)
     return _scheduler_instance
\ No newline at end of file
@@ -1,25 +1,178 @@
+import hashlib
+import re
 import ssl
 import socket
 import datetime
 import asyncio
+import time
 import httpx
 from urllib.parse import urlparse
-from typing import Dict, Optional, List, Any
+from typing import Callable, Dict, Iterable, Optional, List, Any, Tuple
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http import http_client
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _build_unverified_context() -> ssl.SSLContext:
+    """TLS context that accepts any certificate so it can be inspected"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+# Built once: loading the CA store and cipher list on every check is costly
+_UNVERIFIED_CONTEXT = _build_unverified_context()
+
+# Directive names are case-insensitive and the value may be quoted (RFC 6797)
+_HSTS_MAX_AGE_RE = re.compile(r'max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+# Points deducted from a perfect security score of 100 per finding
+_SCORE_DEDUCTIONS: Dict[str, int] = {
+    "invalid": 50,
+    "expired": 40,
+    "self_signed": 30,
+    "expiring_soon": 20,
+    "weak_key": 25,
+    "no_https": 30,
+    "no_hsts": 15
+}
+_VULNERABLE_PROTOCOL_DEDUCTION = 15
+
+# Whether each finding applies, given (cert_info, ssl_config, https_info)
+_SCORE_PREDICATES: Dict[str, Callable[[Dict, Dict, Dict], bool]] = {
+    "invalid": lambda cert, config, https: not cert["valid"],
+    "expired": lambda cert, config, https: cert["expired"],
+    "self_signed": lambda cert, config, https: cert["self_signed"],
+    "expiring_soon": lambda cert, config, https: cert["days_until_expiry"] < 30,
+    "weak_key": lambda cert, config, https: bool(cert["key_size"]) and cert["key_size"] < 2048,
+    "no_https": lambda cert, config, https: not https["enforced"],
+    "no_hsts": lambda cert, config, https: not https["hsts_enabled"]
+}
+
+def _clean_check(cert_info: Optional[Dict[str, Any]]) -> bool:
+    """Whether a check finished without errors, so a timeout or refused
+    connection isn't remembered for the whole cache TTL"""
+    return cert_info is not None and not cert_info.get("errors")
+
 class SSLChecker:
-    def __init__(self):
+    # How long a resolved address is reused for certificate and TLS checks
+    DNS_CACHE_TTL_SECONDS = 600
+    # Head start each resolved address gets before the next one is tried
+    HAPPY_EYEBALLS_DELAY_SECONDS = 0.25
+    # Parsed certificates kept by SHA-256 fingerprint
+    CERTIFICATE_CACHE_MAX_ENTRIES = 4096
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.timeout = 10
+        self.client = client
+        self._addresses: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        # Certificates change on a scale of days, so repeat checks of a URL
+        # (e.g. the mobile and desktop scans) can share one result
+        self._results = TTLCache(ttl=settings.SSL_CACHE_TTL_SECONDS, invalidate=False)
+        # Different URLs of one host (http://, https://, paths) share a handshake
+        self._handshakes = TTLCache(ttl=settings.SSL_CACHE_TTL_SECONDS, invalidate=False)
+        self._certificates: Dict[bytes, Tuple[datetime.datetime, datetime.datetime, Dict[str, Any]]] = {}
+    
+    async def resolve_hosts(self, hostnames: Iterable[Optional[str]], port: int = 443):
+        """
+        Resolve each distinct hostname once, concurrently, so the per-site
+        checks that follow connect without a lookup of their own
+        """
+        unique = {hostname for hostname in hostnames if hostname}
+        results = await asyncio.gather(
+            *(self._resolve(hostname, port) for hostname in unique),
+            return_exceptions=True
+        )
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        logger.info("Resolved %d/%d hostnames", len(unique) - failed, len(unique))
+    
+    async def _resolve(self, hostname: str, port: int) -> List[str]:
+        """Addresses to connect to for hostname:port, from the cache when fresh"""
+        key = (hostname, port)
+        cached = self._addresses.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        # getaddrinfo runs in the executor instead of blocking the event loop
+        infos = await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(hostname, port, type=socket.SOCK_STREAM),
+            timeout=self.timeout
+        )
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._addresses[key] = (time.monotonic() + self.DNS_CACHE_TTL_SECONDS, addresses)
+        return addresses
+    
+    async def _open_tls(self, hostname: str, port: int, timeout: float) -> asyncio.StreamWriter:
+        """Complete a TLS handshake without blocking the event loop"""
+        addresses = await self._resolve(hostname, port)
+        return await asyncio.wait_for(self._connect_first(hostname, port, addresses), timeout=timeout)
+    
+    async def _connect_first(self, hostname: str, port: int, addresses: List[str]) -> asyncio.StreamWriter:
+        """
+        Happy Eyeballs (RFC 8305): start a handshake per address, each one
+        HAPPY_EYEBALLS_DELAY_SECONDS after the last (or as soon as it fails),
+        and keep the first that succeeds
+        """
+        async def connect(address: str) -> asyncio.StreamWriter:
+            _, writer = await asyncio.open_connection(
+                address, port, ssl=_UNVERIFIED_CONTEXT, server_hostname=hostname
+            )
+            return writer
+        
+        if not addresses:
+            raise OSError(f"no addresses for host {hostname}")
+        
+        tasks: List[asyncio.Task] = []
+        winner = None
+        try:
+            for index, address in enumerate(addresses):
+                tasks.append(asyncio.create_task(connect(address)))
+                # The last address gets no stagger: wait until every attempt settles
+                delay = None if index == len(addresses) - 1 else self.HAPPY_EYEBALLS_DELAY_SECONDS
+                while winner is None:
+                    winner = next((t for t in tasks if t.done() and not t.exception()), None)
+                    running = [t for t in tasks if not t.done()]
+                    if winner or not running:
+                        break
+                    done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break
+                if winner:
+                    return winner.result()
+            # Every attempt failed; the last one tried is the most telling
+            raise tasks[-1].exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif task is not winner and not task.exception():
+                    await self._close_tls(task.result())
+    
+    async def _close_tls(self, writer: asyncio.StreamWriter):
+        """Close a connection opened by _open_tls, ignoring shutdown errors"""
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
         
     async def check_ssl_comprehensive(self, url: str) -> Dict[str, Any]:
         """
         Comprehensive SSL/TLS security check for a website
         Returns detailed security analysis including certificate validity, encryption strength, etc.
         """
+        return await self._results.get_or_set(
+            url, lambda: self._check_ssl(url), cacheable=lambda result: _clean_check(result.get("certificate"))
+        )
+    
+    async def _check_ssl(self, url: str) -> Dict[str, Any]:
+        """Run the SSL/TLS checks for url without consulting the cache"""
         parsed_url = urlparse(url)
         hostname = parsed_url.hostname
         port = parsed_url.port or 443
@@ -27,14 +180,26 @@ class SSLChecker:
         if not hostname:
             return {"error": "Invalid URL - no hostname found"}
             
-        # Check if site redirects to HTTPS
-        https_redirect = await self._check_https_redirect(url)
-        
-        # Get SSL certificate info
-        cert_info = await self._get_certificate_info(hostname, port)
-        
-        # Check SSL/TLS configuration
-        ssl_config = await self._check_ssl_configuration(hostname, port)
+        # Every probe needs the host's address; if it doesn't resolve, skip
+        # them all instead of letting each wait out its own timeout
+        try:
+            await self._resolve(hostname, port)
+        except Exception as e:
+            logger.error("Could not resolve %s: %s", hostname, e)
+            https_redirect = self._empty_https_info()
+            cert_info, ssl_config = self._empty_tls_info()
+            cert_info["errors"].append(f"DNS resolution failed: {str(e)}")
+        else:
+            # The HTTPS redirect check and the TLS inspection are independent,
+            # so run them concurrently
+            https_redirect, (cert_info, ssl_config) = await asyncio.gather(
+                self._check_https_redirect(url),
+                self._handshakes.get_or_set(
+                    (hostname, port),
+                    lambda: self._inspect_tls(hostname, port),
+                    cacheable=lambda inspection: _clean_check(inspection[0])
+                )
+            )
         
         # Calculate overall security score
         security_score = self._calculate_security_score(cert_info, ssl_config, https_redirect)
@@ -52,6 +217,44 @@ class SSLChecker:
             "shame_worthy": self._is_shame_worthy(cert_info, ssl_config, https_redirect)
         }
     
+    def _empty_https_info(self) -> Dict[str, Any]:
+        """HTTPS enforcement result before anything has been checked"""
+        return {
+            "enforced": False,
+            "redirects_to_https": False,
+            "hsts_enabled": False,
+            "hsts_max_age": None,
+            "mixed_content_risk": False
+        }
+    
+    def _empty_tls_info(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Certificate and TLS configuration results before any handshake"""
+        cert_info = {
+            "valid": False,
+            "expired": True,
+            "self_signed": False,
+            "days_until_expiry": 0,
+            "issuer": None,
+            "subject": None,
+            "valid_from": None,
+            "valid_until": None,
+            "san_domains": [],
+            "signature_algorithm": None,
+            "key_size": None,
+            "certificate_chain_length": 0,
+            "errors": []
+        }
+        ssl_config = {
+            "protocols_supported": [],
+            "ciphers_supported": [],
+            "vulnerable_protocols": [],
+            "weak_ciphers": [],
+            "perfect_forward_secrecy": False,
+            "compression_enabled": False,
+            "renegotiation_secure": True
+        }
+        return cert_info, ssl_config
+    
     async def _check_https_redirect(self, url: str) -> Dict[str, Any]:
         """Check if HTTP redirects to HTTPS and if HTTPS is enforced"""
         parsed = urlparse(url)
@@ -61,214 +264,192 @@ class SSLChecker:
         if parsed.port and parsed.port != 80:
             http_url += f":{parsed.port}"
             
-        https_info = {
-            "enforced": False,
-            "redirects_to_https": False,
-            "hsts_enabled": False,
-            "hsts_max_age": None,
-            "mixed_content_risk": False
-        }
+        https_info = self._empty_https_info()
         
         try:
-            async with httpx.AsyncClient(follow_redirects=True, timeout=self.timeout) as client:
+            async with http_client(self.client) as client:
                 # Check HTTP redirect
+                https_response = None
                 try:
-                    http_response = await client.get(http_url)
+                    http_response = await self._fetch_headers(client, http_url)
                     if http_response.url.scheme == "https":
                         https_info["redirects_to_https"] = True
                         https_info["enforced"] = True
+                        # The redirect already landed on HTTPS; its headers carry the HSTS policy
+                        https_response = http_response
                 except Exception as e:
-                    logger.debug(f"HTTP check failed for {http_url}: {e}")
+                    logger.debug("HTTP check failed for %s: %s", http_url, e)
                 
-                # Check HTTPS and HSTS headers
+                # Only request HTTPS separately when the redirect probe didn't end there
                 https_url = url if url.startswith("https://") else f"https://{parsed.hostname}"
-                try:
-                    https_response = await client.get(https_url)
-                    
-                    # Check HSTS header
+                if https_response is None:
+                    try:
+                        https_response = await self._fetch_headers(client, https_url)
+                    except Exception as e:
+                        logger.debug("HTTPS check failed for %s: %s", https_url, e)
+                
+                # Check HSTS header
+                if https_response is not None:
                     hsts_header = https_response.headers.get("strict-transport-security")
                     if hsts_header:
                         https_info["hsts_enabled"] = True
                         # Extract max-age
-                        for directive in hsts_header.split(";"):
-                            if directive.strip().startswith("max-age="):
-                                try:
-                                    https_info["hsts_max_age"] = int(directive.split("=")[1])
-                                except:
-                                    pass
-                                    
-                except Exception as e:
-                    logger.debug(f"HTTPS check failed for {https_url}: {e}")
+                        max_age = _HSTS_MAX_AGE_RE.search(hsts_header)
+                        if max_age:
+                            https_info["hsts_max_age"] = int(max_age.group(1))
                     
         except Exception as e:
-            logger.error(f"HTTPS redirect check failed for {url}: {e}")
+            logger.error("HTTPS redirect check failed for %s: %s", url, e)
             
         return https_info
     
-    async def _get_certificate_info(self, hostname: str, port: int) -> Dict[str, Any]:
-        """Get detailed SSL certificate information"""
-        cert_info = {
-            "valid": False,
-            "expired": True,
-            "self_signed": False,
-            "days_until_expiry": 0,
-            "issuer": None,
-            "subject": None,
-            "valid_from": None,
-            "valid_until": None,
-            "san_domains": [],
-            "signature_algorithm": None,
-            "key_size": None,
-            "certificate_chain_length": 0,
-            "errors": []
-        }
+    async def _fetch_headers(self, client: httpx.AsyncClient, url: str) -> httpx.Response:
+        """
+        Follow url's redirects and return the final response without its
+        body, since only the landing URL and headers are inspected
+        """
+        response = await client.head(url, follow_redirects=True, timeout=self.timeout)
+        if response.status_code not in (405, 501):
+            return response
+        
+        # Server refuses HEAD: GET instead, but never read past the headers
+        async with client.stream(
+            "GET", url, headers={"Range": "bytes=0-0"}, follow_redirects=True, timeout=self.timeout
+        ) as response:
+            return response
+    
+    async def _inspect_tls(self, hostname: str, port: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Get certificate information and TLS configuration from a single
+        handshake, since one connection already yields both
+        """
+        cert_info, ssl_config = self._empty_tls_info()
         
         try:
-            # Create SSL context
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            # Connect and get certificate
-            with socket.create_connection((hostname, port), timeout=self.timeout) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    # Get certificate in DER format
-                    cert_der = ssock.getpeercert(binary_form=True)
-                    cert = x509.load_der_x509_certificate(cert_der, default_backend())
-                    
-                    # Basic certificate info - use UTC timezone-aware versions
-                    cert_info["valid_from"] = cert.not_valid_before_utc.isoformat()
-                    cert_info["valid_until"] = cert.not_valid_after_utc.isoformat()
-                    
-                    # Check if certificate is valid (not expired)
-                    now = datetime.datetime.now(datetime.timezone.utc)
-                    if cert.not_valid_before_utc <= now <= cert.not_valid_after_utc:
-                        cert_info["valid"] = True
-                        cert_info["expired"] = False
-                        
-                    # Days until expiry
-                    days_until_expiry = (cert.not_valid_after_utc - now).days
-                    cert_info["days_until_expiry"] = days_until_expiry
-                    
-                    # Certificate details
-                    cert_info["issuer"] = cert.issuer.rfc4514_string()
-                    cert_info["subject"] = cert.subject.rfc4514_string()
-                    cert_info["signature_algorithm"] = cert.signature_algorithm_oid._name
-                    
-                    # Get public key info
-                    public_key = cert.public_key()
-                    if hasattr(public_key, 'key_size'):
-                        cert_info["key_size"] = public_key.key_size
-                    
-                    # Check for self-signed
-                    if cert.issuer == cert.subject:
-                        cert_info["self_signed"] = True
-                    
-                    # Get SAN (Subject Alternative Names)
-                    try:
-                        san_ext = cert.extensions.get_extension_for_oid(x509.ExtensionOID.SUBJECT_ALTERNATIVE_NAME)
-                        cert_info["san_domains"] = [name.value for name in san_ext.value]
-                    except x509.ExtensionNotFound:
-                        pass
-                    
-                    # Certificate chain length (try to get if available)
-                    try:
-                        cert_info["certificate_chain_length"] = len(ssock.getpeercert_chain())
-                    except AttributeError:
-                        cert_info["certificate_chain_length"] = 1  # At least the server cert
-                    
+            writer = await self._open_tls(hostname, port, timeout=self.timeout)
+            try:
+                ssock = writer.get_extra_info("ssl_object")
+                self._read_certificate(ssock, cert_info)
+                self._read_ssl_configuration(ssock, ssl_config)
+            finally:
+                await self._close_tls(writer)
+                
         except ssl.SSLError as e:
             cert_info["errors"].append(f"SSL Error: {str(e)}")
-            logger.error(f"SSL error for {hostname}:{port}: {e}")
+            logger.error("SSL error for %s:%s: %s", hostname, port, e)
         except socket.timeout:
             cert_info["errors"].append("Connection timeout")
-            logger.error(f"Timeout connecting to {hostname}:{port}")
+            logger.error("Timeout connecting to %s:%s", hostname, port)
         except Exception as e:
             cert_info["errors"].append(f"Unexpected error: {str(e)}")
-            logger.error(f"Unexpected error checking {hostname}:{port}: {e}")
+            logger.error("Unexpected error checking %s:%s: %s", hostname, port, e)
             
-        return cert_info
+        return cert_info, ssl_config
     
-    async def _check_ssl_configuration(self, hostname: str, port: int) -> Dict[str, Any]:
-        """Check SSL/TLS configuration and supported protocols"""
-        ssl_config = {
-            "protocols_supported": [],
-            "ciphers_supported": [],
-            "vulnerable_protocols": [],
-            "weak_ciphers": [],
-            "perfect_forward_secrecy": False,
-            "compression_enabled": False,
-            "renegotiation_secure": True
+    def _read_certificate(self, ssock: ssl.SSLObject, cert_info: Dict[str, Any]):
+        """Fill cert_info with detailed SSL certificate information"""
+        # Get certificate in DER format; an already parsed certificate is
+        # found by fingerprint, so only the time-dependent fields are redone
+        cert_der = ssock.getpeercert(binary_form=True)
+        fingerprint = hashlib.sha256(cert_der).digest()
+        details = self._certificates.get(fingerprint)
+        if details is None:
+            details = self._parse_certificate(cert_der)
+            if len(self._certificates) >= self.CERTIFICATE_CACHE_MAX_ENTRIES:
+                del self._certificates[next(iter(self._certificates))]
+            self._certificates[fingerprint] = details
+        
+        not_before, not_after, fields = details
+        cert_info.update(fields)
+        cert_info["san_domains"] = list(fields["san_domains"])
+        
+        # Check if certificate is valid (not expired)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if not_before <= now <= not_after:
+            cert_info["valid"] = True
+            cert_info["expired"] = False
+            
+        # Days until expiry
+        cert_info["days_until_expiry"] = (not_after - now).days
+        
+        # Certificate chain length (try to get if available)
+        try:
+            cert_info["certificate_chain_length"] = len(ssock.getpeercert_chain())
+        except AttributeError:
+            cert_info["certificate_chain_length"] = 1  # At least the server cert
+    
+    def _parse_certificate(self, cert_der: bytes) -> Tuple[datetime.datetime, datetime.datetime, Dict[str, Any]]:
+        """Validity window and the fixed cert_info fields of a DER certificate"""
+        cert = x509.load_der_x509_certificate(cert_der, default_backend())
+        
+        # Basic certificate info - use UTC timezone-aware versions
+        fields = {
+            "valid_from": cert.not_valid_before_utc.isoformat(),
+            "valid_until": cert.not_valid_after_utc.isoformat(),
+            "issuer": cert.issuer.rfc4514_string(),
+            "subject": cert.subject.rfc4514_string(),
+            "signature_algorithm": cert.signature_algorithm_oid._name,
+            "key_size": None,
+            # Check for self-signed
+            "self_signed": cert.issuer == cert.subject,
+            "san_domains": []
         }
         
-        # Test TLS configuration by connecting and checking the negotiated protocol
+        # Get public key info
+        public_key = cert.public_key()
+        if hasattr(public_key, 'key_size'):
+            fields["key_size"] = public_key.key_size
+        
+        # Get SAN (Subject Alternative Names)
         try:
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            with socket.create_connection((hostname, port), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    # Get the negotiated protocol version
-                    protocol_version = ssock.version()
-                    if protocol_version:
-                        ssl_config["protocols_supported"].append(protocol_version)
-                        
-                        # Mark vulnerable protocols
-                        if protocol_version in ["SSLv2", "SSLv3", "TLSv1", "TLSv1.1"]:
-                            ssl_config["vulnerable_protocols"].append(protocol_version)
-                    
-                    # Get cipher info
-                    cipher = ssock.cipher()
-                    if cipher:
-                        ssl_config["ciphers_supported"].append(cipher[0])
-                        
-                        # Check for weak ciphers (basic check)
-                        cipher_name = cipher[0].lower()
-                        if any(weak in cipher_name for weak in ['rc4', 'md5', 'des']):
-                            ssl_config["weak_ciphers"].append(cipher[0])
-                            
-        except Exception as e:
-            logger.debug(f"SSL configuration check failed for {hostname}:{port}: {e}")
+            san_ext = cert.extensions.get_extension_for_oid(x509.ExtensionOID.SUBJECT_ALTERNATIVE_NAME)
+            fields["san_domains"] = [name.value for name in san_ext.value]
+        except x509.ExtensionNotFound:
+            pass
         
-        return ssl_config
+        return cert.not_valid_before_utc, cert.not_valid_after_utc, fields
+    
+    def _read_ssl_configuration(self, ssock: ssl.SSLObject, ssl_config: Dict[str, Any]):
+        """Fill ssl_config with the negotiated protocol and cipher"""
+        # Get the negotiated protocol version
+        protocol_version = ssock.version()
+        if protocol_version:
+            ssl_config["protocols_supported"].append(protocol_version)
+        
+            # Mark vulnerable protocols
+            if protocol_version in ["SSLv2", "SSLv3", "TLSv1", "TLSv1.1"]:
+                ssl_config["vulnerable_protocols"].append(protocol_version)
+        
+        # Get cipher info
+        cipher = ssock.cipher()
+        if cipher:
+            ssl_config["ciphers_supported"].append(cipher[0])
+        
+            # Check for weak ciphers (basic check)
+            cipher_name = cipher[0].lower()
+            if any(weak in cipher_name for weak in ['rc4', 'md5', 'des']):
+                ssl_config["weak_ciphers"].append(cipher[0])
     
     def _calculate_security_score(self, cert_info: Dict, ssl_config: Dict, https_info: Dict) -> int:
         """Calculate overall security score (0-100)"""
-        score = 100
+        flags = [flag for flag, applies in _SCORE_PREDICATES.items() if applies(cert_info, ssl_config, https_info)]
+        score = 100 - sum(_SCORE_DEDUCTIONS[flag] for flag in flags)
+        # Each vulnerable protocol supported costs points of its own
+        score -= len(ssl_config["vulnerable_protocols"]) * _VULNERABLE_PROTOCOL_DEDUCTION
         
-        # Certificate issues
-        if not cert_info["valid"]:
-            score -= 50  # Major penalty for invalid cert
-        if cert_info["expired"]:
-            score -= 40  # Major penalty for expired cert
-        if cert_info["self_signed"]:
-            score -= 30  # Penalty for self-signed
-        if cert_info["days_until_expiry"] < 30:
-            score -= 20  # Penalty for soon-to-expire cert
-        if cert_info["key_size"] and cert_info["key_size"] < 2048:
-            score -= 25  # Penalty for weak key
-            
-        # SSL configuration issues
-        if ssl_config["vulnerable_protocols"]:
-            score -= len(ssl_config["vulnerable_protocols"]) * 15
-            
-        # HTTPS enforcement issues
-        if not https_info["enforced"]:
-            score -= 30  # Major penalty for no HTTPS enforcement
-        if not https_info["hsts_enabled"]:
-            score -= 15  # Penalty for no HSTS
-            
         return max(0, min(100, score))
     
     def _generate_recommendations(self, cert_info: Dict, ssl_config: Dict, https_info: Dict) -> List[str]:
         """Generate security recommendations"""
         recommendations = []
+        days_until_expiry = cert_info["days_until_expiry"]
+        key_size = cert_info["key_size"]
+        vulnerable_protocols = ssl_config["vulnerable_protocols"]
         
         if cert_info["expired"]:
             recommendations.append("🚨 URGENT: SSL certificate has expired - renew immediately")
-        elif cert_info["days_until_expiry"] < 30:
-            recommendations.append(f"⚠️  SSL certificate expires in {cert_info['days_until_expiry']} days - renew soon")
+        elif days_until_expiry < 30:
+            recommendations.append(f"⚠️  SSL certificate expires in {days_until_expiry} days - renew soon")
             
         if cert_info["self_signed"]:
             recommendations.append("🔒 Use a trusted Certificate Authority instead of self-signed certificates")
@@ -279,10 +460,10 @@ class SSLChecker:
         if not https_info["hsts_enabled"]:
             recommendations.append("🛡️  Enable HTTP Strict Transport Security (HSTS) headers")
             
-        if ssl_config["vulnerable_protocols"]:
-            recommendations.append(f"🚫 Disable vulnerable protocols: {', '.join(ssl_config['vulnerable_protocols'])}")
+        if vulnerable_protocols:
+            recommendations.append(f"🚫 Disable vulnerable protocols: {', '.join(vulnerable_protocols)}")
             
-        if cert_info["key_size"] and cert_info["key_size"] < 2048:
+        if key_size and key_size < 2048:
             recommendations.append("🔑 Use at least 2048-bit RSA keys or 256-bit ECC keys")
             
         return recommendations
@@ -297,13 +478,13 @@ class SSLChecker:
             severity = "critical"
         elif not https_info["enforced"]:
             shame_reasons.append("No HTTPS enforcement")
-            severity = "high" if severity != "critical" else severity
+            severity = "high"
         elif cert_info["self_signed"]:
             shame_reasons.append("Self-signed certificate")
-            severity = "medium" if severity not in ["critical", "high"] else severity
-        elif ssl_config["vulnerable_protocols"]:
-            shame_reasons.append(f"Supports vulnerable protocols: {', '.join(ssl_config['vulnerable_protocols'])}")
-            severity = "medium" if severity not in ["critical", "high"] else severity
+            severity = "medium"
+        elif vulnerable_protocols := ssl_config["vulnerable_protocols"]:
+            shame_reasons.append(f"Supports vulnerable protocols: {', '.join(vulnerable_protocols)}")
+            severity = "medium"
             
         return {
             "worthy": len(shame_reasons) > 0,
@@ -12,6 +12,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.services.pagespeed import PageSpeedInsights
 from app.core.config import settings
+from app.core.http import create_scan_client
 
 async def main():
     if not settings.GOOGLE_PAGESPEED_API_KEY or settings.GOOGLE_PAGESPEED_API_KEY == "your_pagespeed_api_key_here":
@@ -21,7 +22,6 @@ async def main():
         return
     
     print("🚀 Testing PageSpeed Insights API...")
-    pagespeed = PageSpeedInsights()
     
     # Test URLs
     test_urls = [
@@ -30,12 +30,21 @@ async def main():
         "https://www.google.com",   # Fast reference site
     ]
     
-    for url in test_urls:
+    # Analyze all URLs concurrently over one pooled client, bounded like the crawler
+    semaphore = asyncio.Semaphore(settings.PAGESPEED_CONCURRENCY)
+    
+    async def analyze(url):
+        async with semaphore:
+            return await pagespeed.analyze_url(url, "mobile")
+    
+    async with create_scan_client(max_connections=settings.PAGESPEED_CONCURRENCY) as client:
+        pagespeed = PageSpeedInsights(client=client)
+        results = await asyncio.gather(*(analyze(url) for url in test_urls))
+    
+    for url, result in zip(test_urls, results):
         print(f"\n📊 Analyzing: {url}")
         print("-" * 60)
         
-        result = await pagespeed.analyze_url(url, "mobile")
-        
         if result:
             scores = result['scores']
             env = result['environmental_impact']
@@ -59,4 +68,10 @@ async def main():
             print("❌ Failed to analyze (check URL accessibility or API key)")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # uvloop is optional; fall back to the stock event loop without it
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
\ No newline at end of file
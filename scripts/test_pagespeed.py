@@ -7,6 +7,8 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.services.pagespeed import PageSpeedInsights
+from app.core.config import settings
+from app.core.http import create_scan_client
 
 async def test_pagespeed_analysis():
     """Test the PageSpeed Insights service"""
@@ -17,15 +19,22 @@ async def test_pagespeed_analysis():
         # Add more URLs as needed
     ]
     
-    pagespeed = PageSpeedInsights()
+    # Analyze all URLs concurrently over one pooled client, bounded like the crawler
+    semaphore = asyncio.Semaphore(settings.PAGESPEED_CONCURRENCY)
     
-    for url in test_urls:
+    async def analyze(url):
+        async with semaphore:
+            # Analyze both mobile and desktop
+            return await pagespeed.analyze_both_strategies(url)
+    
+    async with create_scan_client(max_connections=settings.PAGESPEED_CONCURRENCY * 2) as client:
+        pagespeed = PageSpeedInsights(client=client)
+        all_results = await asyncio.gather(*(analyze(url) for url in test_urls))
+    
+    for url, results in zip(test_urls, all_results):
         print(f"\nAnalyzing: {url}")
         print("-" * 80)
         
-        # Analyze both mobile and desktop
-        results = await pagespeed.analyze_both_strategies(url)
-        
         # Display mobile results
         if results['mobile']:
             mobile = results['mobile']
@@ -67,4 +76,10 @@ async def test_pagespeed_analysis():
 
 if __name__ == "__main__":
     # Note: Make sure you have set GOOGLE_PAGESPEED_API_KEY in your .env file
-    asyncio.run(test_pagespeed_analysis())
\ No newline at end of file
+    # uvloop is optional; fall back to the stock event loop without it
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(test_pagespeed_analysis())
+    else:
+        uvloop.run(test_pagespeed_analysis())
\ No newline at end of file
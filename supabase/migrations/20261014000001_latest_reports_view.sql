@@ -0,0 +1,17 @@
+-- Latest report per website, used by the leaderboard so that sorting and
+-- limiting happen in Postgres instead of in the API process.
+create or replace view latest_reports as
+select distinct on (website_id) *
+from reports
+order by website_id, scan_date desc;
+
+-- Lets DISTINCT ON read one tuple per website.
+create index if not exists reports_website_scan_idx
+    on reports (website_id, scan_date desc);
+
+-- Top and bottom performer lookups. A multi-column ORDER BY only uses an
+-- index whose directions match, so both orderings are indexed.
+create index if not exists reports_overall_score_asc_idx
+    on reports (overall_score asc, id asc);
+create index if not exists reports_overall_score_desc_idx
+    on reports (overall_score desc, id asc);
@@ -0,0 +1,39 @@
+-- Aggregates for the /stats dashboard, computed over the latest report of
+-- every active website in a single pass.
+create or replace function dashboard_stats()
+returns json
+language sql
+stable
+as $$
+    with latest as (
+        select r.*
+        from latest_reports r
+        join websites w on w.id = r.website_id
+        where w.is_active
+    ),
+    ratings as (
+        select carbon_rating, count(*) as n
+        from latest
+        where carbon_rating is not null
+        group by carbon_rating
+    )
+    select json_build_object(
+        'total_websites', (select count(*) from websites where is_active),
+        'websites_scanned', count(*),
+        'most_recent_scan', max(scan_date),
+        'average_performance_score', coalesce(avg(coalesce(performance_score, 0)), 0),
+        'average_accessibility_score', coalesce(avg(coalesce(accessibility_score, 0)), 0),
+        'average_best_practices_score', coalesce(avg(coalesce(best_practices_score, 0)), 0),
+        'average_seo_score', coalesce(avg(coalesce(seo_score, 0)), 0),
+        'average_overall_score', coalesce(avg(coalesce(overall_score, 0)), 0),
+        'ssl_valid_count', count(*) filter (where ssl_valid),
+        'ssl_expired_count', count(*) filter (where ssl_expired),
+        'https_enforced_count', count(*) filter (where https_enforced),
+        'hsts_enabled_count', count(*) filter (where hsts_enabled),
+        'shame_worthy_count', count(*) filter (where shame_worthy),
+        'ssl_shame_worthy_count', count(*) filter (where ssl_shame_worthy),
+        'average_co2_grams', coalesce(avg(coalesce(carbon_co2_grams, 0)), 0),
+        'carbon_rating_counts', (select coalesce(json_object_agg(carbon_rating, n), '{}'::json) from ratings)
+    )
+    from latest;
+$$;
@@ -0,0 +1,43 @@
+-- Point each website at its most recent report so the leaderboard can embed
+-- it with a single primary-key join instead of a per-website lookup.
+alter table websites
+    add column if not exists latest_report_id uuid
+    references reports (id) on delete set null;
+
+update websites w
+set latest_report_id = l.id
+from (
+    select distinct on (website_id) id, website_id
+    from reports
+    order by website_id, scan_date desc
+) l
+where l.website_id = w.id;
+
+-- Keep the pointer current on every insert, whichever client writes the report.
+create or replace function set_website_latest_report()
+returns trigger
+language plpgsql
+as $$
+begin
+    update websites w
+    set latest_report_id = new.id
+    where w.id = new.website_id
+      and not exists (
+          select 1 from reports r
+          where r.id = w.latest_report_id
+            and r.scan_date > new.scan_date
+      );
+    return new;
+end;
+$$;
+
+drop trigger if exists reports_set_website_latest_report on reports;
+create trigger reports_set_website_latest_report
+    after insert on reports
+    for each row execute function set_website_latest_report();
+
+-- Same columns as before, now resolved through the pointer.
+create or replace view latest_reports as
+select r.*
+from websites w
+join reports r on r.id = w.latest_report_id;
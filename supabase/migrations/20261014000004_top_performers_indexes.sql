@@ -0,0 +1,13 @@
+-- Top/bottom performers are served by `order by overall_score desc|asc
+-- nulls last limit 5`. Postgres only does a top-N index walk when the
+-- index matches the null ordering too, and a plain `desc` index sorts
+-- nulls first, so rebuild it as `desc nulls last`.
+drop index if exists reports_overall_score_desc_idx;
+create index if not exists reports_overall_score_desc_idx
+    on reports (overall_score desc nulls last, id asc);
+
+-- Walking reports in score order stops after N rows only if each row can
+-- be matched back to its website through the latest_report_id pointer.
+create index if not exists websites_latest_report_id_idx
+    on websites (latest_report_id)
+    where is_active;
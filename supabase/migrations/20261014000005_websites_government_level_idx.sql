@@ -0,0 +1,3 @@
+-- Website listing and the leaderboard filter on both columns.
+create index if not exists websites_active_government_level_idx
+    on websites (is_active, government_level);
@@ -0,0 +1,5 @@
+-- Per-website report history filtered by strategy, newest first.
+-- reports_website_scan_idx is kept: with strategy in the middle this index
+-- cannot return an unfiltered website's reports in scan_date order.
+create index if not exists reports_website_strategy_scan_idx
+    on reports (website_id, strategy, scan_date desc);
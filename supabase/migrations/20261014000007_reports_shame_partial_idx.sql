@@ -0,0 +1,10 @@
+-- Shame wall: only shame-worthy reports, optionally one severity, in the
+-- leaderboard's overall_score order. A partial index stays proportional to
+-- the number of flagged reports rather than the whole reports table.
+create index if not exists reports_shame_partial_idx
+    on reports (overall_score desc nulls last, id)
+    where shame_worthy;
+
+create index if not exists reports_shame_severity_partial_idx
+    on reports (ssl_shame_severity, overall_score desc nulls last)
+    where shame_worthy;
@@ -0,0 +1,5 @@
+-- Keyset pagination orders by (overall_score, id) with id following the
+-- score direction, so the descending index needs id desc as well.
+drop index if exists reports_overall_score_desc_idx;
+create index if not exists reports_overall_score_desc_idx
+    on reports (overall_score desc nulls last, id desc);
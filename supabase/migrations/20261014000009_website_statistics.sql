@@ -0,0 +1,33 @@
+-- Aggregates for /leaderboard/statistics: one pass over websites and one
+-- over reports, with FILTER clauses instead of per-counter subqueries.
+create or replace function website_statistics()
+returns json
+language sql
+stable
+as $$
+    with w as (
+        select
+            count(*) as total_websites,
+            count(*) filter (where is_active) as active_websites
+        from websites
+    ),
+    r as (
+        select
+            count(*) as total_reports,
+            coalesce(avg(overall_score) filter (where overall_score > 0), 0) as average_overall_score,
+            count(*) filter (where shame_worthy) as shame_worthy_count,
+            count(*) filter (where not coalesce(ssl_valid, false)) as ssl_issues_count,
+            max(scan_date) as latest_scan_date
+        from reports
+    )
+    select json_build_object(
+        'total_websites', w.total_websites,
+        'active_websites', w.active_websites,
+        'total_reports', r.total_reports,
+        'average_overall_score', r.average_overall_score,
+        'shame_worthy_count', r.shame_worthy_count,
+        'ssl_issues_count', r.ssl_issues_count,
+        'latest_scan_date', r.latest_scan_date
+    )
+    from w, r;
+$$;
@@ -0,0 +1,5 @@
+-- Active website listing (get_all_websites / get_websites_for_crawling)
+-- orders by name; the partial index returns rows already sorted instead
+-- of sorting the whole table per request.
+create index if not exists websites_active_name_idx
+    on websites (name) where is_active;
@@ -0,0 +1,28 @@
+-- Shame wall reasons, evaluated once per report when it is written instead
+-- of on every shame wall read. Mirrors the rules the API used to apply:
+-- at most one SSL reason, then very poor performance and accessibility.
+alter table reports
+    add column if not exists shame_reasons text[]
+    generated always as (
+        array_remove(array[
+            case
+                when ssl_expired then 'Expired SSL certificate'
+                when not coalesce(ssl_valid, false) then 'Invalid SSL certificate'
+                when not coalesce(https_enforced, false) then 'HTTPS not enforced'
+            end,
+            case
+                when performance_score < 30
+                then 'Very poor performance (' || performance_score::text || '/100)'
+            end,
+            case
+                when accessibility_score < 50
+                then 'Poor accessibility (' || accessibility_score::text || '/100)'
+            end
+        ], null)
+    ) stored;
+
+-- Views expand r.* when created, so redefine this one to pick up the column.
+create or replace view latest_reports as
+select r.*
+from websites w
+join reports r on r.id = w.latest_report_id;
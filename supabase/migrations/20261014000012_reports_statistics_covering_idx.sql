@@ -0,0 +1,7 @@
+-- website_statistics() aggregates four narrow columns over every report.
+-- Covering them in one index lets Postgres answer it with an index-only
+-- scan instead of reading the wide report rows; reports are append-only,
+-- so the visibility map stays set and heap fetches are rare.
+create index if not exists reports_statistics_covering_idx
+    on reports (scan_date)
+    include (overall_score, shame_worthy, ssl_valid);
@@ -0,0 +1,142 @@
+"""
+Shared fixtures: replay recorded PageSpeed and SSL responses so the
+integration tests run without network access
+"""
+import socket
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.http import create_scan_client
+from app.services.database import DatabaseService
+from app.services.pagespeed import PageSpeedInsights
+from app.services.ssl_checker import SSLChecker
+from tests.fixture_helpers import FIXTURES, PAGESPEED_API_HOST, json_fixture_response, load_fixture
+from tests.tls_helpers import serve
+
+# Hosts the live SSL tests connect to
+LIVE_SSL_HOSTS = (
+    "google.com", "www.google.com", "www.usa.gov",
+    "neverssl.com", "expired.badssl.com", "self-signed.badssl.com"
+)
+
+
+def _recorded_hosts(kind: str) -> set:
+    return {path.stem for path in (FIXTURES / kind).glob("*.json")}
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip @pytest.mark.live tests unless they were selected with -m live"""
+    if "live" in (config.getoption("-m") or ""):
+        return
+    skip_live = pytest.mark.skip(reason="hits real services; run with -m live")
+    for item in items:
+        if "live" in item.keywords:
+            item.add_marker(skip_live)
+
+
+def _replay_http(request: httpx.Request) -> httpx.Response:
+    """PSI answers from tests/fixtures/pagespeed; sites with a recording answer 200"""
+    recorded = _recorded_hosts("pagespeed")
+    if request.url.host == PAGESPEED_API_HOST:
+        site = parse_qs(urlparse(str(request.url)).query)["url"][0]
+        host = urlparse(site).hostname
+        if host in recorded:
+            return json_fixture_response(200, "pagespeed", f"{host}.json")
+        return json_fixture_response(400, "pagespeed", "unreachable.json")
+    if request.url.host in recorded:
+        return httpx.Response(200)
+    raise httpx.ConnectError(f"Name or service not known: {request.url.host}", request=request)
+
+
+@pytest_asyncio.fixture
+async def recorded_http_client():
+    """httpx client that replays recorded responses instead of going online"""
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_replay_http)) as client:
+        yield client
+
+
+@pytest.fixture
+def recorded_ssl(monkeypatch):
+    """
+    Make SSLChecker return tests/fixtures/ssl recordings per hostname;
+    hosts without one fail DNS resolution like a missing domain
+    """
+    recorded = _recorded_hosts("ssl")
+
+    async def resolve(self, hostname, port):
+        if hostname not in recorded:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return ["192.0.2.1"]
+
+    async def check_https_redirect(self, url):
+        return load_fixture("ssl", f"{urlparse(url).hostname}.json")["https_redirect"]
+
+    async def inspect_tls(self, hostname, port):
+        recording = load_fixture("ssl", f"{hostname}.json")
+        return recording["certificate"], recording["ssl_configuration"]
+
+    monkeypatch.setattr(SSLChecker, "_resolve", resolve)
+    monkeypatch.setattr(SSLChecker, "_check_https_redirect", check_https_redirect)
+    monkeypatch.setattr(SSLChecker, "_inspect_tls", inspect_tls)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def db_service():
+    """One DatabaseService (and HTTP/2 pool) for the whole session, closed at the end"""
+    db = DatabaseService()
+    yield db
+    await db.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def scan_client():
+    """One pooled HTTP/2 client for every outbound test call, so TCP + TLS setup happens once per host"""
+    client = create_scan_client(max_connections=20)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture(scope="session")
+def pagespeed_service(scan_client):
+    """One PageSpeedInsights instance shared by the whole session"""
+    return PageSpeedInsights(client=scan_client)
+
+
+@pytest.fixture(scope="session")
+def ssl_checker(scan_client):
+    """One SSLChecker instance shared by the whole session"""
+    return SSLChecker(client=scan_client)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def live_ssl_checker(ssl_checker):
+    """
+    The session SSLChecker with every live test host resolved up front,
+    concurrently, so the live tests connect from its DNS cache
+    """
+    await ssl_checker.resolve_hosts(LIVE_SSL_HOSTS)
+    return ssl_checker
+
+
+@pytest_asyncio.fixture(scope="session")
+async def expired_tls_port():
+    """Port of a local TLS server presenting a certificate that expired in 2020"""
+    async with serve("expired") as port:
+        yield port
+
+
+@pytest_asyncio.fixture(scope="session")
+async def self_signed_tls_port():
+    """Port of a local TLS server presenting a self-signed certificate"""
+    async with serve("self_signed") as port:
+        yield port
+
+
+@pytest_asyncio.fixture(scope="session")
+async def http_only_port():
+    """Port of a local plain-HTTP server that never redirects to HTTPS"""
+    async with serve() as port:
+        yield port
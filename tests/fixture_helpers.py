@@ -0,0 +1,30 @@
+"""
+Readers for the recorded responses under tests/fixtures, shared by
+conftest.py and the test modules
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import httpx
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGESPEED_API_HOST = "www.googleapis.com"
+
+
+def load_fixture(*parts: str) -> dict:
+    """Parse a JSON file under tests/fixtures"""
+    return json.loads(fixture_bytes(*parts))
+
+
+@lru_cache(maxsize=None)
+def fixture_bytes(*parts: str) -> bytes:
+    """Raw contents of a file under tests/fixtures, read once per session"""
+    return FIXTURES.joinpath(*parts).read_bytes()
+
+
+def json_fixture_response(status_code: int, *parts: str) -> httpx.Response:
+    """Response replaying a recorded JSON body as-is, without parsing it"""
+    return httpx.Response(
+        status_code, content=fixture_bytes(*parts), headers={"Content-Type": "application/json"}
+    )
@@ -117,7 +117,18 @@ class TestCarbonFootprintCalculator:
         # Good page (1.5g CO2)
         good_rating = calculator._get_carbon_rating(1.5)
         assert good_rating == "B"
-    
+
+    def test_carbon_rating_thresholds_inclusive(self, calculator):
+        """Test values exactly on a band limit get the better rating"""
+        assert calculator._get_carbon_rating(0.5) == "A+"
+        assert calculator._get_carbon_rating(1.0) == "A"
+        assert calculator._get_carbon_rating(7.0) == "D"
+        assert calculator._get_carbon_rating(7.01) == "F"
+
+        assert calculator._get_percentile(0.5) == 95
+        assert calculator._get_percentile(2.0) == 70
+        assert calculator._get_percentile(7.01) == 10
+
     def test_annual_footprint_calculation(self, calculator):
         """Test annual footprint calculation"""
         # Small page footprint
@@ -160,6 +171,32 @@ class TestCarbonFootprintCalculator:
         # Should have many recommendations for such a bad site
         assert len(recommendations) >= 8
     
+    def test_similar_pages_share_cached_result(self, calculator):
+        """Test inputs within one quantization step reuse the cached result"""
+        first = calculator.calculate_website_footprint(2_000_000, server_response_time_ms=810)
+        second = calculator.calculate_website_footprint(2_001_000, server_response_time_ms=790)
+
+        assert second is first
+
+        other = calculator.calculate_website_footprint(2_000_000, energy_source=EnergySource.COAL)
+        assert other is not first
+
+    def test_tiny_page_is_not_rounded_to_zero(self, calculator):
+        """Test quantization never turns a non-zero page into an empty one"""
+        result = calculator.calculate_website_footprint(4000)
+
+        assert result.data_transfer_mb == round(4000 / (1024 * 1024), 4)
+        assert result.data_transfer_co2 > 0
+
+    def test_cached_result_reports_exact_page_size(self, calculator):
+        """Test a cache hit still reports the caller's own page size"""
+        first = calculator.calculate_website_footprint(1_000_000)
+        second = calculator.calculate_website_footprint(1_004_000)
+
+        assert first.data_transfer_mb == 0.95
+        assert second.data_transfer_mb == 0.96
+        assert second.total_co2_grams == first.total_co2_grams
+
     def test_zero_size_page(self, calculator):
         """Test handling of zero-size pages"""
         result = calculator.calculate_website_footprint(0)
@@ -0,0 +1,303 @@
+import asyncio
+import json
+import pytest
+import httpx
+from fastapi import HTTPException
+from postgrest import AsyncPostgrestClient
+from unittest.mock import MagicMock
+from uuid import UUID
+
+from app.api.endpoints import leaderboard, stats
+from app.core.cache import TTLCache, invalidate_caches
+from app.core.http import ORJSONClient
+from app.services.database import DatabaseService
+
+
+class StubbedDatabase(DatabaseService):
+    """DatabaseService whose Supabase requests return (or raise) queued outcomes"""
+
+    def __init__(self, *outcomes):
+        self.supabase = MagicMock()
+        self.outcomes = list(outcomes)
+        self.executed = 0
+
+    async def _execute(self, query):
+        self.executed += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return MagicMock(data=outcome)
+
+
+class PostgrestDatabase(DatabaseService):
+    """DatabaseService running the real postgrest query builder against a mock transport"""
+
+    def __init__(self, handler):
+        self.requests = []
+
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        self.http_client = ORJSONClient(transport=httpx.MockTransport(record))
+        self.supabase = AsyncPostgrestClient("http://supabase.test/rest/v1", http_client=self.http_client)
+
+
+# Positional arguments for the read methods that need them
+METHOD_ARGS = {"get_website_by_id": ("site-1",), "get_websites_by_ids": (["site-1"],)}
+
+LEADERBOARD_ROW = {"id": "site-1", "latest_report": {"id": "report-1", "overall_score": 80}}
+
+
+class TestDatabaseCaching:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("method,data,fallback", [
+        ("get_leaderboard", [LEADERBOARD_ROW], []),
+        ("get_shame_wall", [LEADERBOARD_ROW], []),
+        ("get_website_statistics", {"total_websites": 3, "average_overall_score": 71.234}, None),
+        ("get_website_by_id", [{"id": "site-1"}], None),
+        ("get_all_websites", [{"id": "site-1"}], []),
+        ("get_latest_reports", [{"id": "report-1"}], []),
+        ("get_websites_by_ids", [{"id": "site-1"}], []),
+    ])
+    async def test_failed_fetch_is_not_cached(self, method, data, fallback):
+        """Test a failed read falls back once, and the next call retries instead of serving the fallback"""
+        db = StubbedDatabase(ConnectionError("supabase unavailable"), data)
+
+        args = METHOD_ARGS.get(method, ())
+
+        failed = await getattr(db, method)(*args)
+        if fallback is not None:
+            assert failed == fallback
+        recovered = await getattr(db, method)(*args)
+        cached = await getattr(db, method)(*args)
+
+        assert recovered and recovered != failed
+        assert cached is recovered
+        assert db.executed == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_dashboard_stats_are_not_cached(self):
+        """Test a failed aggregate query answers 500 once instead of caching an empty summary"""
+        invalidate_caches()
+        db = StubbedDatabase(ConnectionError("supabase unavailable"), {"total_websites": 3, "websites_scanned": 2})
+
+        with pytest.raises(HTTPException) as failed:
+            await stats.get_summary(db_service=db)
+        recovered = await stats.get_summary(db_service=db)
+        cached = await stats.get_summary(db_service=db)
+
+        assert failed.value.status_code == 500
+        assert recovered.body == cached.body
+        assert b'"websites_scanned":2' in recovered.body
+        assert db.executed == 2
+
+    @pytest.mark.asyncio
+    async def test_clear_drops_fill_locks(self):
+        """Test invalidation doesn't leave a lock behind for every key ever filled"""
+        cache = TTLCache(ttl=60)
+
+        async def factory():
+            return "value"
+
+        for key in range(10):
+            await cache.get_or_set(key, factory)
+        cache.clear()
+
+        assert cache._entries == {}
+        assert cache._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_fill_in_flight_during_invalidation_is_not_stored(self):
+        """Test a value read before invalidate_caches() isn't cached after it"""
+        cache = TTLCache(ttl=60)
+        started, release = asyncio.Event(), asyncio.Event()
+        values = iter(["before write", "after write"])
+
+        async def slow_factory():
+            started.set()
+            await release.wait()
+            return next(values)
+
+        fill = asyncio.create_task(cache.get_or_set("key", slow_factory))
+        await started.wait()
+        invalidate_caches()
+        release.set()
+
+        assert await fill == "before write"
+        assert await cache.get_or_set("key", slow_factory) == "after write"
+        assert await cache.get_or_set("key", slow_factory) == "after write"
+
+    @pytest.mark.asyncio
+    async def test_leaderboard_rejects_unsupported_sort(self):
+        """Test an unknown sort column raises instead of falling back to an empty page"""
+        db = StubbedDatabase()
+
+        with pytest.raises(ValueError, match="Unsupported sort column"):
+            await db.get_leaderboard(sort_by="name; drop table websites")
+        assert db.executed == 0
+
+
+class TestDatabaseWrites:
+
+    @pytest.mark.asyncio
+    async def test_store_report_inserts_row(self):
+        """Test store_report sends one minimal-return insert and returns the row's own id"""
+        db = PostgrestDatabase(lambda request: httpx.Response(201))
+        row = {"website_id": "site-1", "strategy": "mobile", "overall_score": 80}
+
+        report_id = await db.store_report(row)
+        await db.close()
+
+        [request] = db.requests
+        assert request.method == "POST"
+        assert request.url.path == "/rest/v1/reports"
+        assert "return=minimal" in request.headers["prefer"]
+        assert json.loads(request.content)["id"] == report_id
+
+    @pytest.mark.asyncio
+    async def test_pool_status_counts_requests(self):
+        """Test the pool status reports requests in flight and sent, from the client's own counters"""
+        in_flight = []
+        db = PostgrestDatabase(lambda request: in_flight.append(db.get_pool_status()['in_flight']) or httpx.Response(201))
+
+        await db.store_report({"website_id": "site-1"})
+        await db.store_report({"website_id": "site-2"})
+        await db.close()
+
+        assert in_flight == [1, 1]
+        assert db.get_pool_status() == {'in_flight': 0, 'requests_sent': 2, 'max_size': db.MAX_CONNECTIONS}
+
+
+# Latest report ids are UUIDs, as the leaderboard cursor requires
+REPORT_ID = "5b0c3c59-8d4e-4a4e-9a51-0d6f2b7e1c11"
+
+
+def _leaderboard_page(score):
+    """Mock PostgREST handler answering every leaderboard query with one entry"""
+    row = {"id": "site-1", "latest_report": {"id": REPORT_ID, "overall_score": score}}
+    return lambda request: httpx.Response(200, json=[row])
+
+
+async def _leaderboard_endpoint(db, after_value=None, after_id=None, ascending=False, limit=1):
+    """Call the leaderboard endpoint the way FastAPI would, with query-string values"""
+    response = await leaderboard.get_leaderboard(
+        sort_by=leaderboard.SortBy.overall_score,
+        government_level=None,
+        limit=limit,
+        ascending=ascending,
+        after_value=after_value,
+        after_id=after_id,
+        db_service=db
+    )
+    return json.loads(response.body)
+
+
+def _split_operands(tree: str) -> list:
+    """Top-level operands of a PostgREST logic tree, honouring quotes, escapes and parentheses"""
+    operands, current, depth, quoted, escaped = [], "", 0, False, False
+    for char in tree:
+        if escaped:
+            escaped = False
+        elif char == "\\" and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char in "()":
+            depth += 1 if char == "(" else -1
+        elif not quoted and depth == 0 and char == ",":
+            operands.append(current)
+            current = ""
+            continue
+        current += char
+    return operands + [current]
+
+
+# Characters that are syntax in a PostgREST logic tree
+HOSTILE_VALUE = 'x,id.gt.0),or(a.eq."b\\'
+
+
+class TestLeaderboardPaging:
+
+    def test_quote_filter_value_escapes_syntax(self):
+        """Test quoting wraps the value and escapes backslashes and double quotes"""
+        db = StubbedDatabase()
+
+        assert db._quote_filter_value(HOSTILE_VALUE) == '"x,id.gt.0),or(a.eq.\\"b\\\\"'
+
+    @pytest.mark.asyncio
+    async def test_hostile_cursor_stays_one_operand(self):
+        """Test a cursor value full of filter syntax stays a single operand of the sent filter"""
+        invalidate_caches()
+        db = PostgrestDatabase(_leaderboard_page(71.5))
+
+        await db.get_leaderboard(limit=1, after_value=HOSTILE_VALUE, after_id=REPORT_ID)
+        await db.close()
+
+        tree = db.requests[0].url.params["latest_report.or"]
+        quoted = db._quote_filter_value(HOSTILE_VALUE)
+        assert tree.startswith("(") and tree.endswith(")")
+        assert _split_operands(tree[1:-1]) == [
+            f"overall_score.lt.{quoted}",
+            f'and(overall_score.eq.{quoted},id.lt."{REPORT_ID}")',
+            "overall_score.is.null",
+        ]
+
+    @pytest.mark.parametrize("ascending,after_value,expected", [
+        (False, 71.5, 'overall_score.lt."71.5",and(overall_score.eq."71.5",id.lt."r-9"),overall_score.is.null'),
+        (True, 71.5, 'overall_score.gt."71.5",and(overall_score.eq."71.5",id.gt."r-9"),overall_score.is.null'),
+        (False, None, 'and(overall_score.is.null,id.lt."r-9")'),
+        (True, None, 'and(overall_score.is.null,id.gt."r-9")'),
+    ])
+    def test_keyset_filter(self, ascending, after_value, expected):
+        """Test rows after the cursor are selected with NULL sort values last in both directions"""
+        db = StubbedDatabase()
+
+        assert db._keyset_filter("overall_score", ascending, after_value, "r-9") == expected
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("ascending,direction", [(False, "desc"), (True, "asc")])
+    async def test_first_page_orders_nulls_last(self, ascending, direction):
+        """Test the first page has no cursor filter and sorts NULL scores last"""
+        invalidate_caches()
+        db = PostgrestDatabase(_leaderboard_page(71.5))
+
+        await db.get_leaderboard(limit=1, ascending=ascending)
+        await db.close()
+
+        [request] = db.requests
+        assert "latest_report.or" not in request.url.params
+        assert request.url.params["order"] == (
+            f"latest_report(overall_score).{direction}.nullslast,latest_report(id).{direction}"
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("score,expected", [
+        (71.5, f'(overall_score.lt."71.5",and(overall_score.eq."71.5",id.lt."{REPORT_ID}"),overall_score.is.null)'),
+        (None, f'(and(overall_score.is.null,id.lt."{REPORT_ID}"))'),
+    ])
+    async def test_cursor_round_trip(self, score, expected):
+        """Test a full page's next_cursor, sent back as query parameters, selects the following rows"""
+        invalidate_caches()
+        db = PostgrestDatabase(_leaderboard_page(score))
+
+        first = await _leaderboard_endpoint(db)
+        cursor = first["next_cursor"]
+        after_value = None if cursor["after_value"] is None else str(cursor["after_value"])
+        await _leaderboard_endpoint(db, after_value=after_value, after_id=UUID(cursor["after_id"]))
+        await db.close()
+
+        assert cursor == {"after_value": score, "after_id": REPORT_ID}
+        assert db.requests[1].url.params["latest_report.or"] == expected
+
+    @pytest.mark.asyncio
+    async def test_short_page_has_no_cursor(self):
+        """Test a page shorter than the limit ends the paging"""
+        invalidate_caches()
+        db = PostgrestDatabase(_leaderboard_page(71.5))
+
+        page = await _leaderboard_endpoint(db, limit=5)
+        await db.close()
+
+        assert page["next_cursor"] is None
@@ -0,0 +1,74 @@
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.cache import invalidate_caches
+from app.core.config import settings
+from app.main import _etag_matches, app
+from app.services.deps import get_db
+
+SUMMARY_URL = f"{settings.API_V1_STR}/stats/summary"
+
+
+@pytest_asyncio.fixture
+async def api_db():
+    """Database stub behind the app's get_db dependency, for in-process requests"""
+    db = MagicMock()
+    db.get_dashboard_stats = AsyncMock(return_value={"total_websites": 3, "websites_scanned": 2})
+    app.dependency_overrides[get_db] = lambda: db
+    invalidate_caches()
+    yield db
+    app.dependency_overrides.pop(get_db, None)
+    invalidate_caches()
+
+
+@pytest_asyncio.fixture
+async def api_client(api_db):
+    """httpx client calling the app in-process (lifespan not run)"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+class TestHttpCacheHeaders:
+    """Tests for the ETag handling of the HTTP cache middleware"""
+
+    @pytest.mark.parametrize("if_none_match", [
+        'W/"abc"',
+        '"abc"',
+        '"xyz", W/"abc"',
+        '*',
+    ])
+    def test_etag_matches(self, if_none_match):
+        assert _etag_matches(if_none_match, 'W/"abc"')
+
+    @pytest.mark.parametrize("if_none_match", ['W/"xyz"', '"ab", "c"', ''])
+    def test_etag_mismatch(self, if_none_match):
+        assert not _etag_matches(if_none_match, 'W/"abc"')
+
+    @pytest.mark.asyncio
+    async def test_revalidation_follows_the_data(self, api_client, api_db):
+        """Test a matching If-None-Match gets 304 until the data behind the response changes"""
+        first = await api_client.get(SUMMARY_URL)
+        etag = first.headers["etag"]
+
+        unchanged = await api_client.get(SUMMARY_URL, headers={"If-None-Match": etag})
+
+        api_db.get_dashboard_stats.return_value = {"total_websites": 3, "websites_scanned": 3}
+        invalidate_caches()
+        changed = await api_client.get(SUMMARY_URL, headers={"If-None-Match": etag})
+
+        assert first.status_code == 200 and etag.startswith('W/"')
+        assert "max-age" in first.headers["cache-control"]
+        assert unchanged.status_code == 304 and unchanged.content == b""
+        assert changed.status_code == 200
+        assert changed.json()["websites_scanned"] == 3
+        assert changed.headers["etag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_uncached_paths_get_no_etag(self, api_client):
+        """Test responses outside the leaderboard and stats routes carry no validator"""
+        response = await api_client.get("/")
+
+        assert response.status_code == 200
+        assert "etag" not in response.headers
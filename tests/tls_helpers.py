@@ -0,0 +1,83 @@
+"""
+In-process HTTP and TLS servers for SSL checker tests, serving the
+pre-generated certificates under tests/fixtures/certs
+
+Regenerate the certificates with: python -m tests.tls_helpers
+"""
+import asyncio
+import datetime
+import ssl
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+CERTS = Path(__file__).parent / "fixtures" / "certs"
+
+_RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+async def _respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Answer the first bytes received with an empty 200 and close; a TLS
+    ClientHello sent to the plain server fails fast on the reply
+    """
+    try:
+        await reader.read(65536)
+        writer.write(_RESPONSE)
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+def server_context(name: str) -> ssl.SSLContext:
+    """Server-side TLS context presenting tests/fixtures/certs/<name>.pem"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERTS / f"{name}.pem", CERTS / f"{name}.key")
+    return context
+
+
+@asynccontextmanager
+async def serve(cert_name: Optional[str] = None) -> AsyncIterator[int]:
+    """Serve on 127.0.0.1 and yield the port: TLS with cert_name, plain HTTP without"""
+    context = server_context(cert_name) if cert_name else None
+    server = await asyncio.start_server(_respond, "127.0.0.1", 0, ssl=context)
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def _write_certificate(name: str, not_before: datetime.datetime, not_after: datetime.datetime):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name_attrs = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, f"{name}.watchtower.test")])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name_attrs)
+        .issuer_name(name_attrs)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(not_before)
+        .not_valid_after(not_after)
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    (CERTS / f"{name}.pem").write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    (CERTS / f"{name}.key").write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption()
+    ))
+
+
+if __name__ == "__main__":
+    CERTS.mkdir(parents=True, exist_ok=True)
+    _write_certificate("self_signed", datetime.datetime(2025, 1, 1), datetime.datetime(2045, 1, 1))
+    _write_certificate("expired", datetime.datetime(2019, 1, 1), datetime.datetime(2020, 1, 1))